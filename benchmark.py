@@ -0,0 +1,329 @@
+import sys
+import json
+import types
+import platform
+import tracemalloc
+import subprocess
+from time import perf_counter_ns
+from argparse import ArgumentParser, Namespace
+import numpy as np
+
+from core.spectrum import generate_bands
+from core.settings import compile_bands
+
+ALLOCATION_BYTES: int = 2048
+BAND_ALLOCATION_BYTES: int = 32
+
+
+class FakeInputStream:
+    """Заменитель sd.InputStream: запоминает callback, который бенчмарк вызывает синтетическими блоками."""
+    __slots__ = ('settings', 'callback', 'active')
+
+    def __init__(self, **settings):
+        self.settings = settings
+        self.callback = settings['callback']
+        self.active = False
+
+    def start(self) -> None:
+        self.active = True
+
+    def stop(self) -> None:
+        self.active = False
+
+    def close(self) -> None:
+        self.active = False
+
+    def feed(self, block: np.ndarray) -> None:
+        """Вызывает callback так же, как PortAudio: блок, число кадров, время и флаги статуса."""
+        self.callback(block, block.shape[0], None, 0)
+
+
+class FakePulse:
+    """Заменитель pulsectl.Pulse с единственным устройством вывода по умолчанию."""
+
+    def __init__(self, *args):
+        pass
+
+    def __enter__(self) -> 'FakePulse':
+        return self
+
+    def __exit__(self, *args) -> None:
+        return None
+
+    @staticmethod
+    def server_info() -> types.SimpleNamespace:
+        return types.SimpleNamespace(default_sink_name='benchmark')
+
+    @staticmethod
+    def get_sink_by_name(name: str) -> types.SimpleNamespace:
+        return types.SimpleNamespace(description=name, name=name)
+
+
+class NullScreen:
+    """Виртуальный экран curses: принимает вывод без терминала и считает вызовы addstr."""
+    __slots__ = ('writes', 'size')
+
+    def __init__(self, rows: int, columns: int):
+        self.writes = 0
+        self.size = (rows, columns)
+
+    def addstr(self, *args) -> None:
+        self.writes += 1
+
+    def erase(self) -> None:
+        pass
+
+    def noutrefresh(self) -> None:
+        pass
+
+    def getmaxyx(self) -> tuple[int, int]:
+        return self.size
+
+    @staticmethod
+    def getch() -> int:
+        return -1
+
+
+def install_fake_backends() -> None:
+    """Подменяет sounddevice и pulsectl фейковыми модулями, чтобы бенчмарк работал без PortAudio и PulseAudio."""
+    sounddevice = types.ModuleType('sounddevice')
+    sounddevice.InputStream = FakeInputStream
+    devices: list[dict] = [
+        {'name': 'benchmark', 'index': 0, 'max_input_channels': 2, 'max_output_channels': 2,
+         'default_samplerate': 48000.0}
+    ]
+    sounddevice.query_devices = lambda device=None, kind=None: devices if device is None else devices[device]
+    pulsectl = types.ModuleType('pulsectl')
+    pulsectl.Pulse = FakePulse
+    sys.modules['sounddevice'] = sounddevice
+    sys.modules['pulsectl'] = pulsectl
+
+
+def generate_signal(kind: str, samples: int, channels: int, samplerate: int, seed: int = 0) -> np.ndarray:
+    """Возвращает синтетический сигнал (сэмплы × каналы, float32): sweep, white, pink, silence или burst."""
+    rng = np.random.default_rng(seed)
+    if kind == 'silence':
+        mono: np.ndarray = np.zeros(samples)
+    elif kind == 'sweep':
+        t: np.ndarray = np.arange(samples) / samplerate
+        duration: float = samples / samplerate
+        phase: np.ndarray = 2.0 * np.pi * 20.0 * duration / np.log(1000.0) * (np.exp(t / duration * np.log(1000.0)) - 1)
+        mono = 0.5 * np.sin(phase)
+    elif kind == 'white':
+        mono = 0.3 * rng.standard_normal(samples)
+    elif kind in ('pink', 'burst'):
+        spectrum: np.ndarray = np.fft.rfft(rng.standard_normal(samples))
+        spectrum[1:] /= np.sqrt(np.arange(1, spectrum.size))
+        mono = np.fft.irfft(spectrum, samples)
+        mono *= 0.3 / max(float(np.std(mono)), 1e-12)
+    else:
+        raise ValueError(f'Неизвестный тип сигнала: {kind}')
+    return np.repeat(mono.astype(np.float32)[:, None], channels, axis=1)
+
+
+def get_block_sizes(kind: str, frames: int, block_size: int, seed: int = 0) -> list[int]:
+    """Возвращает число сэмплов, поступающих за кадр: ровно или пачками с пропусками для burst."""
+    if kind != 'burst':
+        return [block_size] * frames
+    rng = np.random.default_rng(seed)
+    return [int(block_size * rng.choice((0, 0, 1, 3))) for _ in range(frames)]
+
+
+def get_percentiles(values: list[int]) -> dict:
+    """Возвращает перцентили задержки в микросекундах."""
+    data: np.ndarray = np.asarray(values, dtype=np.float64) / 1000.0
+    p50, p95, p99 = np.percentile(data, (50, 95, 99))
+    return {'p50_us': round(p50, 2), 'p95_us': round(p95, 2), 'p99_us': round(p99, 2), 'max_us': round(data.max(), 2)}
+
+
+def run_frame(run, screen: NullScreen, block: np.ndarray) -> tuple[int, ...]:
+    """Проводит кадр через callback, grab_samples, calculate, уровни и отрисовку; возвращает отметки времени."""
+    started: int = perf_counter_ns()
+    if block.shape[0]:
+        run.stream.feed(block)
+    captured: int = perf_counter_ns()
+    samples: np.ndarray = run.grab_samples()
+    grabbed: int = perf_counter_ns()
+    db_levels: list[float] = run.calculate(samples)
+    calculated: int = perf_counter_ns()
+    band_levels: list[float] = run.convert_levels_to_percent(run.apply_band_dynamics(db_levels)).tolist()
+    converted: int = perf_counter_ns()
+    run.draw_frame(screen, band_levels)
+    return started, captured, grabbed, calculated, converted, perf_counter_ns()
+
+
+def get_allocation_limit(bands_number: int) -> int:
+    """Возвращает допустимые выделения за кадр анализа: объекты Python вызовов numpy и список уровней полос."""
+    return ALLOCATION_BYTES + BAND_ALLOCATION_BYTES * bands_number
+
+
+def run_case(run, kind: str, samples_number: int, bands_number: int, channels: int, frames: int) -> dict:
+    """Прогоняет один вариант матрицы: callback → grab_samples → calculate → уровни → отрисовка."""
+    run.samples_number = samples_number
+    run.channels_number = channels
+    run.bands = compile_bands(
+        generate_bands('mel' if run.band_layout == 'mel' else 'log', bands_number, 20.0, 20000.0)
+    )
+    run.stop_stream()
+    run.create_buffers()
+    run.start_stream()
+    screen = NullScreen(24, 2 * run.x + 8 * bands_number)
+    run.drawn_cells = None
+
+    warmup: int = max(1, frames // 4)
+    sizes: list[int] = get_block_sizes(kind, warmup + 2 * frames, samples_number)
+    signal: np.ndarray = generate_signal(kind, sum(sizes) + samples_number, channels, run.samplerate)
+    stages: dict = {'callback': [], 'grab_samples': [], 'calculate': [], 'band_levels': [], 'render': []}
+    analysis_allocations: list[int] = []
+    allocations: list[int] = []
+    position: int = 0
+
+    for index, size in enumerate(sizes):
+        block: np.ndarray = signal[position:position + size]
+        position += size
+        if index < warmup + frames:
+            timings: tuple[int, ...] = run_frame(run, screen, block)
+            if index >= warmup:
+                for name, started, finished in zip(stages, timings, timings[1:]):
+                    stages[name].append(finished - started)
+            continue
+        if index == warmup + frames:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        before: int = tracemalloc.get_traced_memory()[0]
+        if size:
+            run.stream.feed(block)
+        db_levels: list[float] = run.calculate(run.grab_samples())
+        analysis_allocations.append(tracemalloc.get_traced_memory()[1] - before)
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        run.draw_frame(screen, [run.convert_to_percent(d) for d in db_levels])
+        allocations.append(analysis_allocations[-1] + tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+
+    total: np.ndarray = np.sum([stages[name] for name in stages], axis=0)
+    return {
+        'signal': kind,
+        'samples_number': samples_number,
+        'bands': bands_number,
+        'channels_number': channels,
+        'stages': {name: get_percentiles(values) for name, values in stages.items()},
+        'frame': get_percentiles(total.tolist()),
+        'frames_per_second': round(1e9 / float(np.mean(total)), 1),
+        'alloc_bytes_per_frame': {'mean': round(float(np.mean(allocations)), 1), 'max': int(np.max(allocations))},
+        'analysis_alloc_bytes_per_frame': {
+            'mean': round(float(np.mean(analysis_allocations)), 1), 'max': int(np.max(analysis_allocations))
+        },
+        'screen_writes_per_frame': round(screen.writes / float(len(sizes)), 2),
+    }
+
+
+def get_metadata() -> dict:
+    """Возвращает сведения об окружении и коммите для сравнения результатов между прогонами."""
+    try:
+        commit: str = subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'), capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = 'unknown'
+    return {
+        'commit': commit, 'python': platform.python_version(), 'numpy': np.__version__,
+        'machine': platform.machine(), 'system': platform.system(),
+    }
+
+
+def compare_results(previous: dict, current: dict) -> None:
+    """Печатает изменение медианы кадра и выделений памяти относительно прошлых результатов."""
+    def get_key(case: dict) -> tuple:
+        return case['signal'], case['samples_number'], case['bands'], case['channels_number']
+
+    baseline: dict = {get_key(case): case for case in previous['cases']}
+    print(f'\nСравнение с {previous["metadata"]["commit"]}:')
+    for case in current['cases']:
+        old: dict | None = baseline.get(get_key(case))
+        if old is None:
+            continue
+        ratio: float = case['frame']['p50_us'] / max(old['frame']['p50_us'], 1e-9)
+        print(
+            f'{case["signal"]:>8} n={case["samples_number"]:<5} bands={case["bands"]:<4} ch={case["channels_number"]} '
+            f'p50 {old["frame"]["p50_us"]:>9.1f} → {case["frame"]["p50_us"]:>9.1f} мкс (x{ratio:.2f}), '
+            f'alloc {old["alloc_bytes_per_frame"]["mean"]:.0f} → {case["alloc_bytes_per_frame"]["mean"]:.0f} байт'
+        )
+
+
+def parse_arguments() -> Namespace:
+    """Разбирает аргументы командной строки бенчмарка."""
+    parser = ArgumentParser(description='Бенчмарк горячего пути capture → analyze → render на синтетическом звуке.')
+    parser.add_argument('--signals', nargs='+', default=['sweep', 'white', 'pink', 'silence', 'burst'])
+    parser.add_argument('--samples', nargs='+', type=int, default=[512, 1024, 2048])
+    parser.add_argument('--bands', nargs='+', type=int, default=[9, 32, 128])
+    parser.add_argument('--channels', nargs='+', type=int, default=[1, 2])
+    parser.add_argument(
+        '--layout', choices=('custom', 'mel'), default='custom',
+        help='custom: прямоугольные полосы с усреднением бинов; mel: треугольный банк фильтров'
+    )
+    parser.add_argument('--frames', type=int, default=200, help='количество измеряемых кадров на вариант')
+    parser.add_argument('--output', metavar='FILE', help='сохранить результаты в JSON')
+    parser.add_argument('--compare', metavar='FILE', help='сравнить с ранее сохранёнными результатами')
+    parser.add_argument(
+        '--check-allocations', action='store_true',
+        help='завершиться с ошибкой, если callback, grab_samples и calculate выделяют в установившемся режиме '
+             'больше памяти, чем нужно на объекты Python со списком уровней'
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Прогоняет матрицу вариантов и печатает/сохраняет результаты."""
+    arguments: Namespace = parse_arguments()
+    install_fake_backends()
+
+    import core.visualisation
+    from core.run import RunProgram
+
+    core.visualisation.color_pair = lambda number: number
+    core.visualisation.doupdate = lambda: None
+    run = RunProgram()
+    run.hop_size = None
+    run.band_layout = arguments.layout
+
+    cases: list[dict] = []
+    for kind in arguments.signals:
+        for samples_number in arguments.samples:
+            for bands_number in arguments.bands:
+                for channels in arguments.channels:
+                    case: dict = run_case(run, kind, samples_number, bands_number, channels, arguments.frames)
+                    cases.append(case)
+                    print(
+                        f'{kind:>8} n={samples_number:<5} bands={bands_number:<4} ch={channels} '
+                        f'p50 {case["frame"]["p50_us"]:>9.1f} мкс, p99 {case["frame"]["p99_us"]:>9.1f} мкс, '
+                        f'{case["frames_per_second"]:>9.1f} кадр/с, '
+                        f'alloc {case["alloc_bytes_per_frame"]["mean"]:>7.0f} байт/кадр '
+                        f'(анализ {case["analysis_alloc_bytes_per_frame"]["max"]:>5})'
+                    )
+    run.stop_stream()
+
+    failed: list[dict] = [
+        case for case in cases
+        if case['analysis_alloc_bytes_per_frame']['max'] > get_allocation_limit(case['bands'])
+    ]
+    for case in failed:
+        print(
+            f'Выделение памяти в анализе: {case["signal"]} n={case["samples_number"]} ch={case["channels_number"]}: '
+            f'{case["analysis_alloc_bytes_per_frame"]["max"]} байт/кадр, '
+            f'допустимо {get_allocation_limit(case["bands"])}'
+        )
+
+    results: dict = {'metadata': get_metadata(), 'cases': cases}
+    if arguments.output:
+        with open(arguments.output, 'w', encoding='UTF-8') as json_file:
+            json.dump(results, json_file, ensure_ascii=False, indent=4)
+    if arguments.compare:
+        with open(arguments.compare, encoding='UTF-8') as json_file:
+            compare_results(json.load(json_file), results)
+    if arguments.check_allocations and failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,80 +1,158 @@
-import math
-import queue
+from time import monotonic, perf_counter
+from threading import Lock
 import numpy as np
-import sounddevice as sd
-from pulsectl import Pulse
 
+from .dynamics import BandDynamics
+from .instrumentation import Instrumentation
+from .multirate import LowBandAnalyzer
+from .ring_buffer import RingBuffer
+from .sources import CaptureSource, SourceBatch
+from .spectrum import SpectralPlan, get_window_vector
 from .visualisation import Visualisation
 
 
 class DeviceSelection(Visualisation):
-    __slots__ = ('device_list',)
+    __slots__ = ('device_list', 'device_infos', 'sink_name')
 
     def __init__(self):
         super().__init__()
-        try:
-            self.device_list = sd.query_devices()
-        except Exception as e:
-            self.logger.debug('Не удалось получить данные об аудиоустройствах: %s', e)
+        self.device_list = None
+        self.device_infos = {}
+        self.sink_name = None
+
+    def get_device_list(self) -> list:
+        """Перечисляет все аудиоустройства при первом обращении; при ошибке возвращает пустой список."""
+        if self.device_list is None:
+            import sounddevice as sd
+            try:
+                self.device_list = sd.query_devices()
+                self.logger.debug('Доступные устройства:\n%s', self.device_list)
+            except Exception as e:
+                self.logger.debug('Не удалось получить данные об аудиоустройствах: %s', e)
+                self.device_list = []
+        return self.device_list
+
+    def get_device_info(self, index: int) -> dict | None:
+        """Возвращает описание одного устройства без перечисления остальных или None, если его нет."""
+        info: dict | None = self.device_infos.get(index)
+        if info is None:
+            import sounddevice as sd
+            try:
+                info = dict(sd.query_devices(index))
+            except Exception as e:
+                self.logger.debug('Не удалось получить данные об аудиоустройстве %s: %s', index, e)
+                return None
+            self.device_infos[index] = info
+        return info
 
-    def _get_device_name(self) -> str | None:
-        """Возвращает имя системного устройства вывода или None."""
+    @staticmethod
+    def get_device_fingerprint(info: dict) -> list:
+        """Возвращает отпечаток устройства, по которому проверяется, что под индексом то же устройство."""
+        return [
+            str(info.get('name', '')), info.get('hostapi'), info.get('max_input_channels'),
+            info.get('max_output_channels')
+        ]
+
+    def _get_default_sink(self) -> tuple[str | None, str | None]:
+        """Возвращает имя системного устройства вывода по умолчанию и его описание (или имя), либо (None, None)."""
         system: str | None = self.verify_os()
 
         if system is None:
             self.logger.debug('Неизвестное значение platform.system(): %s', system)
-            return None
+            return None, None
 
         if system == 'Linux':
+            from pulsectl import Pulse
             try:
                 with Pulse('get-default-output') as pulse:
                     default = pulse.server_info().default_sink_name
                     if not default:
-                        return None
+                        return None, None
                     try:
                         sink = pulse.get_sink_by_name(default)
                     except Exception:
                         self.logger.exception('Не удалось установить sink; установлен sink=None.')
                         sink = None
                     if sink:
-                        return sink.description or sink.name
-                    return default
+                        return default, sink.description or sink.name
+                    return default, default
             except Exception as e:
                 self.logger.exception('Не удалось получить стандартный (по умолчанию) выход PulseAudio: %s', e)
-                return None
+                return None, None
 
-        return None
+        return None, None
 
     def _get_outputs(self, log: str) -> int | None:
         """Пытается вернуть последний индекс списка звуковых устройств"""
         self.logger.info(log)
-        outputs = [d for d in self.device_list if d.get('max_output_channels', 0) > 0]
+        outputs = [d for d in self.get_device_list() if d.get('max_output_channels', 0) > 0]
         if outputs:
             return outputs[-1].get('index')
         return None
 
-    def verify_device(self) -> int | None:
-        """Проверяет и возвращает индекс выбранного устройства, с откатом к последнему выходному."""
-        if self.device is not None:
-            return self.device
-
-        target: str | None = self._get_device_name()
-
-        if not target:
-            return self._get_outputs(
-                'Имя предпочтительного устройства не получено; возвращаюсь к последнему устройству.'
-            )
-
+    def find_device(self, target: str) -> int | None:
+        """Возвращает индекс устройства, имя которого совпадает с target или содержит его, или None."""
         target_lower: str = str(target).lower().strip()
 
-        for d in self.device_list:
+        for d in self.get_device_list():
             name: str = str(d.get('name', '')).lower().strip()
             if target_lower == name or target_lower in name:
                 index: int = d.get('index')
                 self.logger.info('Выбранное устройство: %s, index: %s', name, index)
                 return index
+        return None
 
-        return self._get_outputs('Предпочитаемое устройство не найдено; использую последнее устройство.')
+    def get_cached_device(self, sink: str) -> int | None:
+        """Возвращает индекс устройства из кэша для устройства вывода sink, если отпечаток устройства совпал."""
+        try:
+            cache: dict = self.get_json_data('config_files', 'devices')
+        except Exception:
+            return None
+        entry: dict | None = cache.get(sink)
+        if not entry:
+            return None
+        info: dict | None = self.get_device_info(entry.get('index'))
+        if info is None or self.get_device_fingerprint(info) != entry.get('fingerprint'):
+            self.logger.info('Устройство из кэша изменилось или пропало; выполняю полный поиск.')
+            return None
+        self.logger.info('Выбранное устройство из кэша: %s, index: %s', info.get('name'), entry.get('index'))
+        return entry.get('index')
+
+    def save_cached_device(self, sink: str, index: int) -> None:
+        """Запоминает найденное устройство для устройства вывода sink в config_files/devices.json."""
+        info: dict | None = self.get_device_info(index)
+        if info is None:
+            return None
+        try:
+            cache: dict = self.get_json_data('config_files', 'devices')
+        except Exception:
+            cache = {}
+        cache[sink] = {'index': index, 'fingerprint': self.get_device_fingerprint(info)}
+        try:
+            self.save_json_data('config_files', 'devices', cache)
+        except Exception as e:
+            self.logger.debug('Не удалось сохранить кэш устройств: %s', e)
+
+    def verify_device(self) -> int | None:
+        """Проверяет и возвращает индекс выбранного устройства: из кэша, иначе полным поиском с откатом."""
+        if self.device is not None:
+            return self.device
+
+        sink, target = self._get_default_sink()
+        self.sink_name = sink
+        cached: int | None = self.get_cached_device(sink or '')
+        if cached is not None:
+            return cached
+
+        index: int | None = self.find_device(target) if target else None
+        if index is None:
+            index = self._get_outputs(
+                'Предпочитаемое устройство не найдено; использую последнее устройство.' if target else
+                'Имя предпочтительного устройства не получено; возвращаюсь к последнему устройству.'
+            )
+        if index is not None:
+            self.save_cached_device(sink or '', index)
+        return index
 
     def verify_selected_device(self) -> int:
         """Возвращает индекс выбранного устройства или кидает RuntimeError, если не найден."""
@@ -85,48 +163,157 @@ class DeviceSelection(Visualisation):
 
 
 class AudioCapture(DeviceSelection):
-    __slots__ = ('selected_device', 'samplerate', 'audio_queue', 'stream')
+    __slots__ = (
+        'selected_device', 'samplerate', 'ring_buffer', 'capture_time', 'loop', 'data_ready', 'notify_pending',
+        'stream', 'instrumentation', 'silence_power', 'idle_period', 'signal_time', 'notify_time', 'sources',
+        'recorder', 'audio_time', 'notify_lock'
+    )
 
     def __init__(self):
         super().__init__()
-        self.selected_device = self.verify_selected_device()
-        self.samplerate = int(self.device_list[self.selected_device].get('default_samplerate', 48000))
-        self.audio_queue = queue.Queue(self.maxsize)
+        self.selected_device = None
+        self.samplerate = 48000
+        self.ring_buffer = None
+        self.capture_time = monotonic()
+        self.loop = None
+        self.data_ready = None
+        self.notify_pending = False
+        self.silence_power = 10.0 ** (self.silence_threshold / 10.0)
+        self.idle_period = 1.0 / self.idle_fps if self.idle_fps > 0 else float('inf')
+        self.audio_time = 0.0
+        self.signal_time = 0.0
+        self.notify_time = self.capture_time
+        self.notify_lock = Lock()
         self.stream = None
+        self.instrumentation = Instrumentation(bool(self.stats_enabled), float(self.stats_interval or 0))
+        self.sources = []
+        self.recorder = None
+        self.create_buffers()
+
+    def select_device(self) -> None:
+        """Выбирает устройство захвата и его частоту дискретизации, а при заданных sources создаёт источники."""
+        self.selected_device = self.verify_selected_device()
+        info: dict = self.get_device_info(self.selected_device) or {}
+        self.samplerate = int(info.get('default_samplerate', 48000))
+        if self.source_devices:
+            self.create_sources()
+
+    def create_buffers(self) -> None:
+        """Выделяет кольцевой буфер под текущие samples_number и maxsize."""
+        self.ring_buffer = RingBuffer(max(2, self.maxsize) * self.samples_number)
+
+    def notify_data(self) -> None:
+        """Выполняется в цикле событий: снимает признак ожидающего уведомления и будит задачу анализа."""
+        self.notify_pending = False
+        self.data_ready.set()
+
+    def verify_idle(self) -> bool:
+        """Проверяет, что мощность захваченных блоков дольше silence_timeout держится ниже silence_threshold."""
+        return self.audio_time - self.signal_time > self.silence_timeout
+
+    def create_sources(self) -> None:
+        """Создаёт источники захвата по списку sources: индексы устройств или подстроки их имён."""
+        self.sources = []
+        for entry in self.source_devices:
+            device: int | None = entry if isinstance(entry, int) else self.find_device(entry)
+            if device is None:
+                raise RuntimeError(f'Устройство источника не найдено: {entry}')
+            info: dict = self.get_device_info(device) or {}
+            channels_number: int = max(1, min(self.channels_number, int(info.get('max_input_channels', 0) or 1)))
+            self.sources.append(CaptureSource(
+                self, device, str(info.get('name', device)), int(info.get('default_samplerate', 48000)),
+                channels_number, max(2, self.maxsize) * self.samples_number, self.samples_number
+            ))
 
     @staticmethod
-    def _convert_to_mono(buffer: np.ndarray) -> np.ndarray:
-        """Преобразует входной буфер в 1D моно numpy-массив dtype float32."""
-        if buffer.ndim > 1:
-            return np.mean(buffer, axis=1, dtype=np.float32)
-        elif buffer.dtype == np.float32:
-            return buffer
-        return buffer.astype(np.float32, copy=False)
-
-    def _enqueue_mono_block(self, buffer) -> bool:
-        """Помещает моно-блок в очередь; при переполнении удаляет старый элемент и повторяет."""
-        mono_block: np.ndarray = self._convert_to_mono(buffer)
+    def get_adc_delay(time, frames: int, samplerate: int) -> float | None:
+        """Возвращает, сколько секунд назад последний сэмпл блока прошёл АЦП, по времени callback PortAudio.
+
+        Возвращает None, если время не передано или API хоста его не заполняет.
+        """
+        if time is None or time.inputBufferAdcTime <= 0.0 or time.currentTime <= 0.0:
+            return None
+        return max(0.0, time.currentTime - time.inputBufferAdcTime - frames / samplerate)
+
+    def notify_block(self, block_power: float, status, started: float, duration: float,
+                     adc_delay: float | None = None) -> None:
+        """Учитывает записанный блок: сравнивает его мощность с порогом тишины и передаёт уведомление циклу событий.
+
+        Время захвата отсчитывается от момента прохождения АЦП, если PortAudio его сообщает, иначе от вызова callback.
+        Тишина отсчитывается по длительности захваченных сэмплов (duration), а не по часам, поэтому быстрое
+        воспроизведение записи уходит в простой на тех же блоках.
+        В режиме простоя цикл событий будится не чаще idle_fps. Источники вызывают метод из своих потоков PortAudio
+        одновременно, поэтому общее состояние меняется под notify_lock.
+        """
+        with self.notify_lock:
+            now: float = monotonic()
+            captured: float = now - adc_delay if adc_delay is not None else now
+            self.capture_time = captured
+            self.audio_time += duration
+            if self.instrumentation.enabled and adc_delay is not None:
+                self.instrumentation.input_latency.record(adc_delay)
+            if block_power >= self.silence_power:
+                self.signal_time = self.audio_time
+            elif (self.audio_time - self.signal_time > self.silence_timeout
+                  and now - self.notify_time < self.idle_period):
+                if self.instrumentation.enabled:
+                    self.instrumentation.record_callback(perf_counter() - started, status)
+                return None
+            loop = self.loop
+            if loop is not None and not self.notify_pending:
+                self.notify_pending = True
+                self.notify_time = now
+                try:
+                    loop.call_soon_threadsafe(self.notify_data)
+                except RuntimeError:
+                    self.notify_pending = False
+            if self.instrumentation.enabled:
+                self.instrumentation.record_callback(perf_counter() - started, status)
+
+    def _audio_callback(self, block, frames, time, status) -> None:
+        """Callback аудиопотока: сводит блок в моно прямо в кольцевой буфер и передаёт уведомление циклу событий."""
+        started: float = perf_counter()
+        if self.recorder is not None:
+            self.recorder.record(block, status, self.samplerate)
+        self.ring_buffer.write(block)
+        self.notify_block(
+            self.ring_buffer.block_power, status, started, frames / self.samplerate,
+            self.get_adc_delay(time, frames, self.samplerate)
+        )
+
+    def get_blocksize(self) -> int:
+        """Возвращает размер блока захвата: blocksize, а без него — samples_number."""
+        return self.samples_number if self.blocksize is None else self.blocksize
+
+    def start_sources(self) -> None:
+        """Запускает потоки всех источников, останавливая уже запущенные при ошибке."""
         try:
-            self.audio_queue.put_nowait(mono_block)
-            return True
-        except queue.Full:
-            try:
-                self.audio_queue.get_nowait()
-            except queue.Empty:
-                pass
-            try:
-                self.audio_queue.put_nowait(mono_block)
-                return True
-            except queue.Full:
-                return False
+            for source in self.sources:
+                source.start(self.get_blocksize(), self.latency)
+                self.logger.info(
+                    'Источник запущен: %s (index %s), частота дискретизации: %s, количество каналов: %s',
+                    source.name, source.device, source.samplerate, source.channels_number
+                )
+        except Exception:
+            self.logger.exception('Не удалось запустить источники захвата.')
+            self.stop_sources()
+            raise
 
-    def _audio_callback(self, block, *args) -> None:
-        """Callback аудиопотока: конвертирует блок и ставит в очередь."""
-        self._enqueue_mono_block(block)
+    def stop_sources(self) -> None:
+        """Останавливает потоки всех источников."""
+        for source in self.sources:
+            try:
+                source.stop()
+            except Exception:
+                self.logger.exception('Ошибка при остановке источника: %s', source.name)
+        self.logger.info('Источники захвата остановлены.')
 
     def start_stream(self) -> None:
-        """Создаёт и запускает входной аудиопоток."""
-        self.logger.info('Доступные устройства:\n%s', self.device_list)
+        """Создаёт и запускает входной аудиопоток, при первом запуске выбирая устройство."""
+        if self.selected_device is None:
+            self.select_device()
+        if self.sources:
+            return self.start_sources()
 
         if getattr(self.stream, 'active', False):
             self.logger.info(
@@ -134,17 +321,21 @@ class AudioCapture(DeviceSelection):
             )
             return None
         try:
+            import sounddevice as sd
             self.stream = sd.InputStream(
                 samplerate=self.samplerate,
-                blocksize=self.samples_number,
+                blocksize=self.get_blocksize(),
                 device=self.selected_device,
                 channels=self.channels_number,
+                latency=self.latency,
                 callback=self._audio_callback,
             )
             self.stream.start()
             self.logger.info(
-                'Частота дискретизации: %s, количество каналов: %s, размер блока: %s, максимальный размер: %s',
-                self.samplerate, self.channels_number, self.samples_number, self.maxsize
+                'Частота дискретизации: %s, количество каналов: %s, размер блока захвата: %s, окно FFT: %s, '
+                'максимальный размер: %s, задержка входа PortAudio: %s с',
+                self.samplerate, self.channels_number, self.get_blocksize(), self.samples_number, self.maxsize,
+                getattr(self.stream, 'latency', None)
             )
             self.logger.info('Аудиопоток запущен.')
         except Exception:
@@ -163,6 +354,8 @@ class AudioCapture(DeviceSelection):
 
     def stop_stream(self) -> None:
         """Останавливает и закрывает аудиопоток, гарантирует сброс атрибута stream."""
+        if self.sources:
+            return self.stop_sources()
         if self.stream is None:
             self.logger.info(
                 'stop_stream вызван, но для выбранного устройства поток не найден: %s', self.selected_device
@@ -184,70 +377,123 @@ class AudioCapture(DeviceSelection):
         finally:
             self.stream = None
 
+    def verify_device_change(self, check_sink: bool) -> str | None:
+        """Возвращает причину переподключения: остановившийся поток или сменившееся устройство вывода по умолчанию."""
+        if not getattr(self.stream, 'active', False):
+            return 'поток остановлен'
+        if check_sink and self.device is None and self._get_default_sink()[0] != self.sink_name:
+            return 'сменилось устройство вывода по умолчанию'
+        return None
+
+    def reconnect_stream(self, reason: str) -> None:
+        """Переоткрывает поток на текущем устройстве по умолчанию с его частотой дискретизации и новыми буферами."""
+        started: float = perf_counter()
+        previous: int = self.selected_device
+        self.stop_stream()
+        import sounddevice as sd
+        if hasattr(sd, '_terminate') and hasattr(sd, '_initialize'):
+            sd._terminate()
+            sd._initialize()
+        self.device_list = None
+        self.device_infos = {}
+        self.select_device()
+        self.create_buffers()
+        self.start_stream()
+        self.logger.info(
+            'Переподключение (%s): устройство %s -> %s, частота дискретизации %s, за %.1f мс',
+            reason, previous, self.selected_device, self.samplerate, 1000.0 * (perf_counter() - started)
+        )
+
 
 class AudioBuilder(AudioCapture):
+    __slots__ = ('read_cursor', 'frame_end', 'silence', 'window')
 
-    @staticmethod
-    def _build_waveform(blocks: list) -> np.ndarray:
-        """Конкатенирует блоки в единый ndarray и сводит в моно по последней оси."""
-        if not blocks:
-            return np.empty(0, dtype=np.float32)
-        waveform: np.ndarray = np.concatenate(blocks, axis=0) if len(blocks) > 1 else blocks[0].copy()
-        if waveform.ndim > 1:
-            waveform = waveform.mean(axis=-1, dtype=np.float32)
-        return waveform
-
-    def _collect_blocks(self) -> list:
-        """Возвращает список всех доступных блоков из очереди (может быть пустым)."""
-        blocks: list = []
-        while True:
-            try:
-                blocks.append(self.audio_queue.get_nowait())
-            except queue.Empty:
-                break
-        return blocks
-
-    def _finalize_window(self, waveform: np.ndarray) -> np.ndarray:
-        """Приводит к dtype=np.float32 и возвращает окно фиксированной длины (паддинг слева)."""
-        if waveform.dtype != np.float32:
-            waveform = waveform.astype(np.float32, copy=False)
-        total: int = waveform.size
-        if total >= self.samples_number:
-            return waveform[-self.samples_number:]
-        padding: np.ndarray = np.zeros(self.samples_number - total, dtype=np.float32)
-        return np.concatenate((padding, waveform))
+    def create_buffers(self) -> None:
+        """Выделяет кольцевой буфер и окно тишины, сбрасывая курсоры чтения."""
+        super().create_buffers()
+        self.read_cursor = 0
+        self.frame_end = 0
+        self.silence = np.zeros(self.samples_number, dtype=np.float32)
+        self.window = np.empty(self.samples_number, dtype=np.float32)
 
     def grab_samples(self) -> np.ndarray:
-        """Собирает все доступные блоки и возвращает окно фиксированной длины (np.float32)."""
-        blocks: list = self._collect_blocks()
-        if not blocks:
-            return np.zeros(self.samples_number, dtype=np.float32)
-        waveform: np.ndarray = self._build_waveform(blocks)
-        return self._finalize_window(waveform)
+        """Возвращает последнее окно фиксированной длины (np.float32) или тишину, если новых данных нет."""
+        written: int = self.ring_buffer.written
+        if written == self.read_cursor:
+            self.instrumentation.empty_grabs += 1
+            return self.silence
+        self.read_cursor = written
+        return self.ring_buffer.read_latest(self.samples_number, self.window)
+
+    def skip_samples(self) -> None:
+        """Пропускает накопленные данные без анализа, сохраняя сетку шагов STFT."""
+        written: int = self.ring_buffer.written
+        self.read_cursor = written
+        if self.hop_size:
+            self.frame_end += (written - self.frame_end) // self.hop_size * self.hop_size
+        for source in self.sources:
+            source.skip_samples()
+
+    def grab_frames(self) -> np.ndarray | None:
+        """Возвращает пакет перекрывающихся окон (кадры × samples_number) с шагом hop_size или None без новых данных.
+
+        Пакет содержит все окна, завершившиеся после предыдущего вызова; если новых данных меньше шага,
+        возвращается пустой пакет. Окна, уже вытесненные из кольцевого буфера, пропускаются.
+        """
+        written: int = self.ring_buffer.written
+        if written == self.read_cursor:
+            self.instrumentation.empty_grabs += 1
+            return None
+        self.read_cursor = written
+
+        hop: int = self.hop_size
+        size: int = self.samples_number
+        count: int = (written - self.frame_end) // hop
+        max_count: int = max(1, (self.ring_buffer.capacity - 2 * size) // hop + 1)
+        if count > max_count:
+            self.instrumentation.dropped_samples += (count - max_count) * hop
+            self.frame_end += (count - max_count) * hop
+            count = max_count
+        if count <= 0:
+            return np.empty((0, size), dtype=np.float32)
+
+        self.frame_end += count * hop
+        span: np.ndarray = self.ring_buffer.read_span(self.frame_end, (count - 1) * hop + size)
+        return np.lib.stride_tricks.sliding_window_view(span, size)[::hop]
 
 
 class Analyzer(AudioBuilder):
+    __slots__ = (
+        'window_type', 'spectral_plan', 'stft_levels', 'dynamics', 'dynamics_cursor', 'source_batch', 'low_bands'
+    )
+
+    def __init__(self):
+        super().__init__()
+        self.window_type = 'hann'
+        self.spectral_plan = None
+        self.stft_levels = None
+        self.dynamics = None
+        self.dynamics_cursor = 0
+        self.source_batch = None
+        self.low_bands = None
+
+    def create_buffers(self) -> None:
+        """Выделяет буферы захвата и сбрасывает привязанное к их курсорам состояние анализа."""
+        super().create_buffers()
+        self.stft_levels = None
+        self.dynamics_cursor = 0
+        self.low_bands = None
+
+    def skip_samples(self) -> None:
+        """Пропускает накопленные данные без анализа, включая децимацию низких полос."""
+        super().skip_samples()
+        if self.low_bands is not None:
+            self.low_bands.skip(self.ring_buffer.written)
 
     @staticmethod
     def get_window_vector(samples_number: int, window_type: str = 'hann') -> np.ndarray:
         """Возвращает numpy-массив коэффициентов оконной функции (dtype=np.float32)."""
-        if samples_number <= 0:
-            return np.empty(0, dtype=np.float32)
-        if samples_number == 1:
-            return np.array([1.0], dtype=np.float32)
-
-        wt: str = window_type.lower()
-        if wt in ('hann', 'hanning'):
-            a, b = 0.5, 0.5
-        elif wt == 'hamming':
-            a, b = 0.54, 0.46
-        else:
-            raise ValueError(f'Неизвестный window_type: {window_type}')
-
-        factor = np.float32(2.0 * np.pi / (samples_number - 1))
-        n = np.arange(samples_number, dtype=np.float32)
-        w = a - b * np.cos(factor * n)
-        return w
+        return get_window_vector(samples_number, window_type)
 
     @staticmethod
     def convert_to_percent(db: float, min_db: float = -80.0, gamma: float = 0.4) -> float:
@@ -259,6 +505,12 @@ class Analyzer(AudioBuilder):
         x: float = (db - min_db) / (-min_db)
         return 100.0 * (x ** gamma)
 
+    @staticmethod
+    def convert_levels_to_percent(db_levels: np.ndarray, min_db: float = -80.0, gamma: float = 0.4) -> np.ndarray:
+        """Преобразовывает массив dBFS в проценты тем же нелинейным отображением, что и convert_to_percent."""
+        x: np.ndarray = np.clip((np.asarray(db_levels, dtype=np.float64) - min_db) / -min_db, 0.0, 1.0)
+        return 100.0 * np.power(x, gamma)
+
     def apply_window_vector(self, signal, window_type: str = 'hann') -> np.ndarray:
         """Возвращает новый массив, полученный поэлементным умножением входного сигнала на вектор окна."""
         x: np.ndarray = np.asarray(signal, dtype=np.float32)
@@ -267,45 +519,166 @@ class Analyzer(AudioBuilder):
         w: np.ndarray = self.get_window_vector(x.size, window_type)
         return x * w
 
+    @staticmethod
+    def verify_silence(x: np.ndarray, eps: float) -> bool:
+        """Проверяет, что все сэмплы по модулю не больше eps, двумя редукциями без временных массивов."""
+        return x.size == 0 or (float(x.max()) <= eps and float(x.min()) >= -eps)
+
+    def get_spectral_plan(self, samples_number: int) -> SpectralPlan:
+        """Возвращает план анализа для размера кадра, перестраивая его при смене настроек или samplerate."""
+        plan: SpectralPlan | None = self.spectral_plan
+        if plan is None or not plan.matches(
+                samples_number, self.samplerate, self.bands, self.window_type, self.band_layout
+        ):
+            plan = SpectralPlan(samples_number, self.samplerate, self.bands, self.window_type, self.band_layout)
+            self.spectral_plan = plan
+            self.logger.debug(
+                'Построен план анализа: размер кадра %s, частота дискретизации %s, полос %s, раскладка %s',
+                samples_number, self.samplerate, len(self.bands), self.band_layout
+            )
+        return plan
+
+    def get_low_band_analyzer(self) -> LowBandAnalyzer:
+        """Возвращает анализ низких полос по децимированному сигналу, перестраивая его при смене настроек."""
+        analyzer: LowBandAnalyzer | None = self.low_bands
+        if analyzer is None or analyzer.key != LowBandAnalyzer.build_key(
+                self.samples_number, self.samplerate, self.bands, self.low_band_decimation, self.low_band_crossover,
+                self.window_type, self.band_layout
+        ):
+            analyzer = LowBandAnalyzer(
+                self.samples_number, self.samplerate, self.bands, self.low_band_decimation, self.low_band_crossover,
+                self.window_type, self.band_layout
+            )
+            analyzer.skip(self.ring_buffer.written)
+            self.low_bands = analyzer
+            self.logger.debug(
+                'Построен анализ низких полос: децимация %s, полос %s, шаг бинов %.1f Гц',
+                self.low_band_decimation, analyzer.low.size,
+                self.samplerate / self.low_band_decimation / self.samples_number
+            )
+        return analyzer
+
+    def apply_low_bands(self, db_levels) -> np.ndarray:
+        """Подставляет в уровни dBFS полосы ниже low_band_crossover, посчитанные по децимированному сигналу."""
+        levels: np.ndarray = np.array(db_levels, dtype=np.float64)
+        analyzer: LowBandAnalyzer = self.get_low_band_analyzer()
+        analyzer.update(self.ring_buffer)
+        return analyzer.apply_levels(levels)
+
     def calculate(self, signal, min_db: float = -80.0, eps: float = 1e-12) -> list[float]:
         """Анализирует входной фрейм signal (np.ndarray или list) и возвращает список уровней dBFS для полос."""
         x: np.ndarray = np.asarray(signal, dtype=np.float32)
         x_size: int = x.size
 
-        if x_size == 0 or np.allclose(x, 0.0, atol=eps):
+        if self.verify_silence(x, eps):
             return [min_db] * len(self.bands)
 
         if x.ndim > 1:
             x: np.ndarray = x.mean(axis=1, dtype=np.float32)
             x_size: int = x.size
-            if x_size == 0 or np.allclose(x, 0.0, atol=eps):
+            if self.verify_silence(x, eps):
                 return [min_db] * len(self.bands)
 
-        xw: np.ndarray = self.apply_window_vector(x, window_type='hann')
-        amp: np.ndarray = np.abs(np.fft.rfft(xw)) / float(x_size)
-
-        if x_size > 1:
-            amp[1:-1] *= 2.0
+        plan: SpectralPlan = self.get_spectral_plan(x_size)
+        return plan.get_levels(x, min_db, eps).tolist()
 
-        freqs: np.ndarray = np.fft.rfftfreq(x_size, d=1.0 / float(self.samplerate))
-        power: np.ndarray = amp ** 2
-
-        out: list[float] = []
-        for low, high in self.bands:
-            start = np.searchsorted(freqs, float(low), side='left')
-            end = np.searchsorted(freqs, float(high), side='left')
-            if end <= start:
-                out.append(min_db)
-                continue
-            segment = power[start:end]
-            rms: float = math.sqrt(float(np.mean(segment)))
-            db: float = 20.0 * math.log10(rms + eps)
-            out.append(float(max(db, min_db)))
-
-        return out
+    def calculate_frames(self, frames: np.ndarray, min_db: float = -80.0, eps: float = 1e-12) -> list[float]:
+        """Анализирует пакет кадров одним 2D rfft и сводит его в уровни dBFS способом stft_aggregate."""
+        if self.verify_silence(frames, eps):
+            return [min_db] * len(self.bands)
+        plan: SpectralPlan = self.get_spectral_plan(frames.shape[-1])
+        return plan.get_levels(frames, min_db, eps, aggregate=self.stft_aggregate).tolist()
+
+    def get_stft_levels(self) -> list[float]:
+        """Возвращает уровни dBFS в режиме скользящего STFT, удерживая прошлые уровни до завершения шага."""
+        frames: np.ndarray | None = self.grab_frames()
+        if frames is None:
+            self.stft_levels = None
+            return self.calculate_frames(self.silence)
+        if frames.shape[0] == 0 and self.stft_levels is not None:
+            return self.stft_levels
+        self.stft_levels = self.calculate_frames(frames)
+        return self.stft_levels
+
+    def create_band_dynamics(self, bands_number: int) -> BandDynamics:
+        """Создаёт состояние динамики полос с постоянными времени из настроек."""
+        return BandDynamics(
+            bands_number, self.attack_ms, self.release_ms, self.rms_ms, self.peak_hold_ms, self.peak_decay_db
+        )
+
+    def get_band_dynamics(self, bands_number: int) -> BandDynamics:
+        """Возвращает состояние динамики полос, создавая его заново при смене количества полос."""
+        dynamics: BandDynamics | None = self.dynamics
+        if dynamics is None or dynamics.bands_number != bands_number:
+            dynamics = self.create_band_dynamics(bands_number)
+            self.dynamics = dynamics
+        return dynamics
+
+    def apply_band_dynamics(self, db_levels: list[float]) -> np.ndarray:
+        """Сглаживает уровни dBFS с шагом по времени, равным длительности звука, захваченного с прошлого вызова."""
+        written: int = self.ring_buffer.written
+        elapsed: float = (written - self.dynamics_cursor) / self.samplerate
+        self.dynamics_cursor = written
+        return self.get_band_dynamics(len(db_levels)).update(db_levels, elapsed)
+
+    def get_bands_number(self) -> int:
+        """Возвращает длину вектора уровней: количество полос, умноженное на количество источников."""
+        return len(self.bands) * max(1, len(self.sources))
+
+    def get_peak_levels(self) -> list[float]:
+        """Возвращает удерживаемые пиковые уровни полос в процентах (всех источников подряд)."""
+        if self.sources:
+            if any(source.dynamics is None for source in self.sources):
+                return [0.0] * self.get_bands_number()
+            peaks: np.ndarray = np.concatenate([source.dynamics.peaks for source in self.sources])
+            return self.convert_levels_to_percent(peaks).tolist()
+        if self.dynamics is None:
+            return [0.0] * len(self.bands)
+        return self.convert_levels_to_percent(self.dynamics.peaks).tolist()
+
+    def get_source_batch(self) -> SourceBatch:
+        """Возвращает общий анализ источников, перестраивая планы при смене настроек."""
+        batch: SourceBatch | None = self.source_batch
+        if batch is None or not self.sources[0].plan.matches(
+                self.samples_number, self.sources[0].samplerate, self.bands, self.window_type, self.band_layout
+        ):
+            batch = SourceBatch(self.sources, self.samples_number, self.bands, self.window_type, self.band_layout)
+            self.source_batch = batch
+            for source in self.sources:
+                source.dynamics = self.create_band_dynamics(len(self.bands))
+        return batch
+
+    def get_source_levels(self) -> list[float]:
+        """Возвращает сглаженные уровни полос всех источников подряд в процентах; FFT источников идут одним пакетом.
+
+        Источник без новых данных сохраняет прошлые уровни, а дольше четырёх блоков захвата — спадает к тишине.
+        """
+        started: float = perf_counter()
+        batch: SourceBatch = self.get_source_batch()
+        silence: list[float] = self.calculate(self.silence)
+        now: float = monotonic()
+        levels: list[np.ndarray] = []
+        for source, db_levels in zip(self.sources, batch.get_levels()):
+            stall_timeout: float = 4.0 * max(self.get_blocksize(), self.samples_number) / source.samplerate
+            levels.append(source.update_dynamics(db_levels, silence, stall_timeout, now))
+        band_levels: np.ndarray = self.convert_levels_to_percent(np.concatenate(levels))
+        if self.instrumentation.enabled:
+            self.instrumentation.fft_time.record(perf_counter() - started)
+        return band_levels.tolist()
 
     def get_band_levels(self) -> list[float]:
-        """Возвращает уровни полос в процентах для текущего сигнала."""
-        signal: np.ndarray = self.grab_samples()
-        db_levels: list[float] = self.calculate(signal)
-        return [self.convert_to_percent(d) for d in db_levels]
+        """Возвращает сглаженные уровни полос в процентах для текущего сигнала."""
+        if self.sources:
+            return self.get_source_levels()
+        started: float = perf_counter()
+        if self.hop_size:
+            db_levels: list[float] = self.get_stft_levels()
+        else:
+            signal: np.ndarray = self.grab_samples()
+            db_levels: list[float] = self.calculate(signal)
+        if self.low_band_decimation > 1:
+            db_levels = self.apply_low_bands(db_levels)
+        levels: np.ndarray = self.convert_levels_to_percent(self.apply_band_dynamics(db_levels))
+        if self.instrumentation.enabled:
+            self.instrumentation.fft_time.record(perf_counter() - started)
+        return levels.tolist()
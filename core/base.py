@@ -3,11 +3,18 @@ import platform
 from json import load, dump, JSONDecodeError
 from logging import config, getLogger
 
+from .settings import Settings
+
 
 class Base:
     __slots__ = (
         'logger', 'config', 'variables', 'device', 'channels_number',
-        'samples_number', 'maxsize', 'bands_levels', 'bands'
+        'samples_number', 'maxsize', 'bands_levels', 'bands', 'hop_size', 'stft_aggregate', 'fps',
+        'stats_enabled', 'stats_interval', 'band_layout', 'bands_number', 'frequency_range', 'silence_threshold',
+        'silence_timeout', 'idle_fps', 'attack_ms', 'release_ms', 'rms_ms', 'peak_hold_ms', 'peak_decay_db',
+        'meter_height', 'half_blocks', 'source_devices', 'source_layout', 'device_check_interval',
+        'config_check_interval', 'settings', 'config_mtime', 'blocksize', 'latency', 'low_band_decimation',
+        'low_band_crossover'
     )
 
     def __init__(self):
@@ -17,6 +24,32 @@ class Base:
             "channels_number": 2,
             "samples_number": 1024,
             "maxsize": 16,
+            "blocksize": None,
+            "latency": None,
+            "hop_size": None,
+            "stft_aggregate": "max",
+            "low_band_decimation": 1,
+            "low_band_crossover": 250,
+            "fps": 10,
+            "silence_threshold": -60,
+            "silence_timeout": 2.0,
+            "idle_fps": 1,
+            "attack_ms": 10,
+            "release_ms": 300,
+            "rms_ms": 0,
+            "peak_hold_ms": 800,
+            "peak_decay_db": 20,
+            "meter_height": 0,
+            "half_blocks": True,
+            "sources": None,
+            "source_layout": "side_by_side",
+            "device_check_interval": 2.0,
+            "config_check_interval": 1.0,
+            "stats_enabled": False,
+            "stats_interval": 60,
+            "band_layout": "custom",
+            "bands_number": 32,
+            "frequency_range": [20, 20000],
             "bands_levels": [2, 6, 25, 45, 70, 80],
             "bands": [
                 [20, 80], [80, 160], [160, 320],
@@ -25,15 +58,8 @@ class Base:
             ]
         }
         self.variables = self.get_config_data('config')
-        try:
-            self.device = self.variables['device']
-            self.channels_number = self.variables['channels_number']
-            self.samples_number = self.variables['samples_number']
-            self.maxsize = self.variables['maxsize']
-            self.bands_levels = self.variables['bands_levels']
-            self.bands = self.variables['bands']
-        except TypeError:
-            print('\nTypeError! Переменные не могут быть инициализированы!')
+        self.config_mtime = self.get_config_mtime()
+        self.apply_settings(Settings(self.variables, self.config))
 
     @staticmethod
     def create_directories() -> None:
@@ -102,6 +128,32 @@ class Base:
             print(f'\nOSError! Не удалось прочитать файл «{config_name}.json» из-за {e}')
             return None
 
+    def apply_settings(self, settings: Settings) -> None:
+        """Переносит проверенные настройки в атрибуты программы."""
+        self.settings = settings
+        for name in settings.__slots__:
+            setattr(self, name, getattr(settings, name))
+
+    @staticmethod
+    def get_config_mtime() -> int | None:
+        """Возвращает время изменения config.json в наносекундах или None, если файл недоступен."""
+        try:
+            return os.stat(os.path.join('config_files', 'config.json')).st_mtime_ns
+        except OSError:
+            return None
+
+    def load_changed_settings(self) -> Settings | None:
+        """Возвращает проверенные настройки, если config.json изменился с прошлой проверки, иначе None.
+
+        Кидает ValueError или OSError, если изменённый файл не читается или содержит некорректные значения.
+        """
+        mtime: int | None = self.get_config_mtime()
+        if mtime is None or mtime == self.config_mtime:
+            return None
+        self.config_mtime = mtime
+        self.variables = self.get_json_data('config_files', 'config')
+        return Settings(self.variables, self.config)
+
     def get_logging_data(self) -> None:
         """Загружает и применяет конфигурацию логирования из JSON-файла."""
         config.dictConfig(self.get_json_data('config_files/logs', 'logging'))
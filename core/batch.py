@@ -0,0 +1,128 @@
+from collections import deque
+from typing import Iterator
+from concurrent.futures import Executor, Future
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+
+from .offline import PcmSource, OfflineAnalyzer
+from .spectrum import SpectralPlan
+
+_plans: dict = {}
+
+
+def get_worker_plan(samples_number: int, samplerate: int, bands: tuple, layout: str) -> SpectralPlan:
+    """Возвращает план анализа, закэшированный в процессе-исполнителе между фрагментами."""
+    key: tuple = (samples_number, samplerate, bands, layout)
+    plan: SpectralPlan | None = _plans.get(key)
+    if plan is None:
+        plan = SpectralPlan(samples_number, samplerate, bands, layout=layout)
+        _plans[key] = plan
+    return plan
+
+
+def analyze_chunk(
+        name: str, shape: tuple[int, int], dtype: str, samplerate: int, samples_number: int, bands: tuple,
+        layout: str, hop: int, batch_frames: int, min_db: float, eps: float
+) -> np.ndarray:
+    """Анализирует фрагмент PCM из разделяемой памяти пакетами той же длины, что и однопроцессный путь."""
+    plan: SpectralPlan = get_worker_plan(samples_number, samplerate, bands, layout)
+    memory = SharedMemory(name=name)
+    try:
+        block: np.ndarray = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+        frames_number: int = (shape[0] - samples_number) // hop + 1
+        levels: np.ndarray = np.empty((frames_number, len(bands)), dtype=np.float32)
+        for first in range(0, frames_number, batch_frames):
+            count: int = min(batch_frames, frames_number - first)
+            start: int = first * hop
+            signal: np.ndarray = PcmSource.convert_to_mono(block[start:start + (count - 1) * hop + samples_number])
+            levels[first:first + count] = OfflineAnalyzer.analyze_signal(plan, signal, hop, min_db, eps)
+        del block
+        return levels
+    finally:
+        memory.close()
+
+
+class ParallelAnalyzer(OfflineAnalyzer):
+    """Пакетный анализ файла в пуле процессов: фрагменты по границам окон передаются через shared memory.
+
+    Размер фрагмента подбирается по длине файла так, чтобы на процесс пришлось около chunks_per_worker фрагментов,
+    а все фрагменты в работе умещались в shared_bytes разделяемой памяти.
+    """
+    __slots__ = ('executor', 'workers', 'chunks_per_worker', 'shared_bytes')
+
+    def __init__(self, source: PcmSource, executor: Executor, workers: int, batch_frames: int = 2048,
+                 chunks_per_worker: int = 4, shared_bytes: int = 48 * 1024 * 1024):
+        super().__init__(source, batch_frames)
+        self.executor = executor
+        self.workers = workers
+        self.chunks_per_worker = chunks_per_worker
+        self.shared_bytes = shared_bytes
+
+    def get_window_bytes(self) -> int:
+        """Возвращает, сколько байт PCM добавляет к фрагменту каждое следующее окно."""
+        return self.hop * self.source.samples.shape[1] * self.source.samples.dtype.itemsize
+
+    def get_chunk_frames(self, frames_number: int) -> int:
+        """Возвращает число окон во фрагменте: целое число пакетов batch_frames, чтобы границы пакетов совпали.
+
+        Фрагментов около chunks_per_worker на процесс, но два фрагмента на процесс должны уместиться в shared_bytes;
+        меньше одного пакета фрагмент не бывает.
+        """
+        target: int = -(-frames_number // (self.chunks_per_worker * self.workers))
+        limit: int = self.shared_bytes // (2 * self.workers * self.get_window_bytes())
+        return max(1, min(-(-target // self.batch_frames), limit // self.batch_frames)) * self.batch_frames
+
+    def get_pending_limit(self, chunk_frames: int) -> int:
+        """Возвращает, сколько фрагментов держать в работе: до двух на процесс в пределах shared_bytes."""
+        chunk_bytes: int = chunk_frames * self.get_window_bytes()
+        return max(1, min(2 * self.workers, self.shared_bytes // chunk_bytes))
+
+    def _submit_chunk(self, first: int, count: int, min_db: float, eps: float) -> tuple[Future, SharedMemory]:
+        """Копирует сэмплы фрагмента с перекрытием на границе в разделяемую память и отправляет его в пул."""
+        start: int = first * self.hop
+        block: np.ndarray = self.source.samples[start:start + (count - 1) * self.hop + self.samples_number]
+        memory = SharedMemory(create=True, size=max(1, block.nbytes))
+        shared: np.ndarray = np.ndarray(block.shape, dtype=block.dtype, buffer=memory.buf)
+        shared[:] = block
+        del shared
+        bands: tuple = tuple((float(low), float(high)) for low, high in self.bands)
+        future: Future = self.executor.submit(
+            analyze_chunk, memory.name, block.shape, block.dtype.str, self.source.samplerate, self.samples_number,
+            bands, self.band_layout, self.hop, self.batch_frames, min_db, eps
+        )
+        return future, memory
+
+    @staticmethod
+    def _collect_chunk(future: Future, memory: SharedMemory) -> np.ndarray:
+        """Дожидается результата фрагмента и освобождает его разделяемую память."""
+        try:
+            return future.result()
+        finally:
+            memory.close()
+            memory.unlink()
+
+    def iter_levels(self, min_db: float = -80.0, eps: float = 1e-12) -> Iterator[tuple[int, np.ndarray]]:
+        """Выдаёт уровни фрагментов по порядку, держа в работе не более двух фрагментов на процесс."""
+        frames_number: int = self.get_frames_number()
+        chunk_frames: int = self.get_chunk_frames(frames_number)
+        pending_limit: int = self.get_pending_limit(chunk_frames)
+        pending: deque = deque()
+        try:
+            for first in range(0, frames_number, chunk_frames):
+                count: int = min(chunk_frames, frames_number - first)
+                pending.append((first, *self._submit_chunk(first, count, min_db, eps)))
+                if len(pending) >= pending_limit:
+                    chunk_first, future, memory = pending.popleft()
+                    yield chunk_first, self._collect_chunk(future, memory)
+            while pending:
+                chunk_first, future, memory = pending.popleft()
+                yield chunk_first, self._collect_chunk(future, memory)
+        finally:
+            for _, future, memory in pending:
+                future.cancel()
+                try:
+                    future.exception()
+                except Exception:
+                    pass
+                memory.close()
+                memory.unlink()
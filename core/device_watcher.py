@@ -0,0 +1,62 @@
+from threading import Thread
+from logging import getLogger
+
+
+class DeviceWatcher:
+    """Подписка на события PulseAudio: смена устройства вывода по умолчанию, появление и пропажа устройств.
+
+    События слушаются в фоновом потоке; на каждое подходящее событие вызывается notify,
+    который должен быть потокобезопасным (например, call_soon_threadsafe цикла событий).
+    """
+    __slots__ = ('notify', 'logger', 'pulse', 'thread')
+
+    def __init__(self, notify):
+        self.notify = notify
+        self.logger = getLogger()
+        self.pulse = None
+        self.thread = None
+
+    def start(self) -> bool:
+        """Подключается к PulseAudio и запускает поток событий; возвращает False, если подписка недоступна."""
+        try:
+            from pulsectl import Pulse
+            self.pulse = Pulse('audio-visualizer-watcher')
+            self.pulse.event_mask_set('server', 'sink', 'source')
+            self.pulse.event_callback_set(self._handle_event)
+        except Exception as e:
+            self.logger.debug('Подписка на события PulseAudio недоступна: %s', e)
+            self.pulse = None
+            return False
+        self.thread = Thread(target=self._listen, name='device-watcher', daemon=True)
+        self.thread.start()
+        return True
+
+    def _listen(self) -> None:
+        """Слушает события до вызова stop или разрыва соединения."""
+        try:
+            self.pulse.event_listen()
+        except Exception as e:
+            self.logger.debug('Подписка на события PulseAudio прервана: %s', e)
+
+    def _handle_event(self, event) -> None:
+        """Передаёт дальше смену сервера (устройства по умолчанию) и появление или пропажу устройств.
+
+        Поля события — pulsectl.EnumValue: они сравниваются со строками напрямую, а str() даёт их repr.
+        """
+        if event.facility == 'server' or event.t in ('new', 'remove'):
+            self.notify()
+
+    def stop(self) -> None:
+        """Останавливает поток событий и закрывает соединение с PulseAudio."""
+        if self.pulse is None:
+            return None
+        try:
+            self.pulse.event_listen_stop()
+            if self.thread is not None:
+                self.thread.join(1.0)
+            self.pulse.close()
+        except Exception as e:
+            self.logger.debug('Не удалось корректно остановить подписку на события PulseAudio: %s', e)
+        finally:
+            self.pulse = None
+            self.thread = None
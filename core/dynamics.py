@@ -0,0 +1,58 @@
+import numpy as np
+
+
+def get_smoothing_factor(elapsed: float, time_constant: float) -> float:
+    """Возвращает долю шага экспоненциального сглаживания за elapsed секунд при постоянной времени в секундах."""
+    if time_constant <= 0.0:
+        return 1.0
+    return 1.0 - float(np.exp(-elapsed / time_constant))
+
+
+class BandDynamics:
+    """Динамика уровней полос dBFS: RMS-интегрирование, атака/спад и удержание пиков с затуханием.
+
+    Состояние всех полос хранится в массивах numpy и обновляется операциями над целыми массивами.
+    Постоянные времени задаются в миллисекундах, а шаг обновления — длительностью нового звука в секундах,
+    поэтому поведение не зависит от частоты кадров и hop_size.
+    """
+    __slots__ = (
+        'bands_number', 'min_db', 'attack', 'release', 'rms', 'hold', 'decay', 'power', 'levels', 'peaks', 'held'
+    )
+
+    def __init__(self, bands_number: int, attack_ms: float = 0.0, release_ms: float = 0.0, rms_ms: float = 0.0,
+                 peak_hold_ms: float = 0.0, peak_decay_db: float = 20.0, min_db: float = -80.0):
+        self.bands_number = bands_number
+        self.min_db = min_db
+        self.attack = attack_ms / 1000.0
+        self.release = release_ms / 1000.0
+        self.rms = rms_ms / 1000.0
+        self.hold = peak_hold_ms / 1000.0
+        self.decay = peak_decay_db
+        self.power = np.zeros(bands_number, dtype=np.float64)
+        self.levels = np.full(bands_number, min_db, dtype=np.float64)
+        self.peaks = np.full(bands_number, min_db, dtype=np.float64)
+        self.held = np.zeros(bands_number, dtype=np.float64)
+
+    def integrate_rms(self, db_levels: np.ndarray, elapsed: float) -> np.ndarray:
+        """Экспоненциально усредняет мощность полос с постоянной времени rms_ms и возвращает её в dBFS."""
+        factor: float = get_smoothing_factor(elapsed, self.rms)
+        power: np.ndarray = np.power(10.0, db_levels / 10.0)
+        self.power += factor * (power - self.power)
+        return np.maximum(10.0 * np.log10(np.maximum(self.power, 1e-30)), self.min_db)
+
+    def update(self, db_levels, elapsed: float) -> np.ndarray:
+        """Применяет к новым уровням dBFS RMS, атаку/спад и удержание пиков; возвращает сглаженные уровни."""
+        x: np.ndarray = np.asarray(db_levels, dtype=np.float64)
+        if self.rms > 0.0:
+            x = self.integrate_rms(x, elapsed)
+        attack: float = get_smoothing_factor(elapsed, self.attack)
+        release: float = get_smoothing_factor(elapsed, self.release)
+        self.levels += np.where(x > self.levels, attack, release) * (x - self.levels)
+
+        rising: np.ndarray = self.levels >= self.peaks
+        self.held += elapsed
+        self.held[rising] = 0.0
+        falling: np.ndarray = self.held > self.hold
+        self.peaks[falling] -= self.decay * np.minimum(self.held[falling] - self.hold, elapsed)
+        np.maximum(self.peaks, self.levels, out=self.peaks)
+        return self.levels
@@ -0,0 +1,81 @@
+from time import monotonic
+import numpy as np
+
+
+class RollingHistogram:
+    """Скользящее окно последних длительностей для оценки перцентилей без выделений памяти при записи."""
+    __slots__ = ('values', 'count')
+
+    def __init__(self, size: int = 1024):
+        self.values = np.zeros(size, dtype=np.float64)
+        self.count = 0
+
+    def record(self, seconds: float) -> None:
+        """Записывает длительность поверх самой старой."""
+        self.values[self.count % self.values.size] = seconds
+        self.count += 1
+
+    def get_summary(self) -> dict:
+        """Возвращает количество замеров и перцентили окна в миллисекундах."""
+        if self.count == 0:
+            return {'count': 0}
+        window: np.ndarray = self.values[:min(self.count, self.values.size)] * 1000.0
+        p50, p95, p99 = np.percentile(window, (50, 95, 99))
+        return {
+            'count': self.count, 'p50_ms': round(float(p50), 3), 'p95_ms': round(float(p95), 3),
+            'p99_ms': round(float(p99), 3), 'max_ms': round(float(window.max()), 3)
+        }
+
+
+class Instrumentation:
+    """Счётчики и гистограммы времени этапов захвата, анализа и отрисовки; выключенные почти ничего не стоят."""
+    __slots__ = (
+        'enabled', 'interval', 'last_export', 'callbacks', 'input_overflows', 'empty_grabs',
+        'dropped_samples', 'callback_time', 'fft_time', 'render_time', 'input_latency', 'display_latency'
+    )
+
+    def __init__(self, enabled: bool = False, interval: float = 0.0):
+        self.enabled = enabled
+        self.interval = interval
+        self.last_export = monotonic()
+        self.callbacks = 0
+        self.input_overflows = 0
+        self.empty_grabs = 0
+        self.dropped_samples = 0
+        self.callback_time = RollingHistogram()
+        self.fft_time = RollingHistogram()
+        self.render_time = RollingHistogram()
+        self.input_latency = RollingHistogram()
+        self.display_latency = RollingHistogram()
+
+    def record_callback(self, seconds: float, status) -> None:
+        """Учитывает вызов callback аудиопотока, его длительность и переполнение входа PortAudio."""
+        self.callbacks += 1
+        self.callback_time.record(seconds)
+        if status and getattr(status, 'input_overflow', False):
+            self.input_overflows += 1
+
+    def get_stats(self) -> dict:
+        """Возвращает снимок счётчиков и гистограмм."""
+        return {
+            'enabled': self.enabled,
+            'callbacks': self.callbacks,
+            'input_overflows': self.input_overflows,
+            'empty_grabs': self.empty_grabs,
+            'dropped_samples': self.dropped_samples,
+            'callback_time': self.callback_time.get_summary(),
+            'fft_time': self.fft_time.get_summary(),
+            'render_time': self.render_time.get_summary(),
+            'input_latency': self.input_latency.get_summary(),
+            'display_latency': self.display_latency.get_summary(),
+        }
+
+    def verify_export(self) -> bool:
+        """Проверяет, пора ли выгрузить статистику по интервалу; по SIGUSR1 цикл событий сразу вызывает log_stats."""
+        if not self.enabled or self.interval <= 0.0:
+            return False
+        now: float = monotonic()
+        if now - self.last_export < self.interval:
+            return False
+        self.last_export = now
+        return True
@@ -0,0 +1,115 @@
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+from .ring_buffer import RingBuffer
+from .spectrum import SpectralPlan
+
+
+def design_lowpass(factor: int, taps_per_phase: int = 16) -> np.ndarray:
+    """Возвращает симметричный КИХ-фильтр (окно Блэкмана) против наложения спектра при децимации в factor раз."""
+    length: int = factor * taps_per_phase
+    n: np.ndarray = np.arange(length) - (length - 1) / 2.0
+    cutoff: float = 0.4 / factor
+    taps: np.ndarray = 2.0 * cutoff * np.sinc(2.0 * cutoff * n) * np.blackman(length)
+    return (taps / taps.sum()).astype(np.float32)
+
+
+class Decimator:
+    """Потоковый децимирующий фильтр: низкочастотная фильтрация и прореживание в factor раз без разрывов между блоками.
+
+    Свёртка считается только в сохраняемых отсчётах (каждом factor-м), как в полифазной схеме,
+    поэтому на входной сэмпл приходится taps_per_phase умножений, а не длина фильтра.
+    """
+    __slots__ = ('factor', 'taps', 'history', 'phase')
+
+    def __init__(self, factor: int, taps_per_phase: int = 16):
+        self.factor = factor
+        self.taps = design_lowpass(factor, taps_per_phase)
+        self.history = np.zeros(self.taps.size - 1, dtype=np.float32)
+        self.phase = 0
+
+    def reset(self) -> None:
+        """Сбрасывает историю фильтра после разрыва во входном сигнале."""
+        self.history[:] = 0.0
+        self.phase = 0
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        """Возвращает прореженные отсчёты для нового блока моно-сигнала, продолжая предыдущий блок."""
+        extended: np.ndarray = np.concatenate((self.history, x))
+        count: int = max(0, (x.size - self.phase + self.factor - 1) // self.factor)
+        step: int = extended.strides[0]
+        windows: np.ndarray = as_strided(
+            extended[self.phase:], shape=(count, self.taps.size), strides=(self.factor * step, step), writeable=False
+        )
+        outputs: np.ndarray = windows @ self.taps
+        self.phase += outputs.size * self.factor - x.size
+        self.history[:] = extended[-self.history.size:]
+        return outputs
+
+
+class LowBandAnalyzer:
+    """Анализ полос ниже частоты раздела по децимированной копии сигнала.
+
+    Окно того же размера после децимации в factor раз охватывает в factor раз больше времени, поэтому шаг бинов
+    для низких полос в factor раз меньше, а стоимость FFT остаётся прежней. Верхние полосы анализируются как раньше,
+    и уровни низких полос подставляются в общий вектор на свои места. Банк фильтров строится по всей раскладке
+    на децимированной частоте, чтобы треугольники низких полос опирались на тех же соседей, что и в полном плане.
+    Пока после создания не накопилось полное децимированное окно, низкие полосы остаются от короткого FFT.
+    """
+    __slots__ = ('key', 'decimator', 'ring_buffer', 'window', 'plan', 'low', 'cursor', 'levels')
+
+    def __init__(self, samples_number: int, samplerate: int, bands, factor: int, crossover: float,
+                 window_type: str = 'hann', layout: str = 'custom'):
+        self.key = self.build_key(samples_number, samplerate, bands, factor, crossover, window_type, layout)
+        edges: np.ndarray = np.asarray(bands, dtype=np.float64).reshape(-1, 2)
+        limit: float = min(crossover, 0.4 * samplerate / factor)
+        self.low = np.flatnonzero(edges[:, 1] <= limit)
+        self.decimator = Decimator(factor)
+        self.ring_buffer = RingBuffer(2 * samples_number)
+        self.window = np.empty(samples_number, dtype=np.float32)
+        self.plan = SpectralPlan(
+            samples_number, samplerate / factor, edges, window_type, layout, self.low
+        ) if self.low.size else None
+        self.levels = np.empty(self.low.size, dtype=np.float64)
+        self.cursor = 0
+
+    @staticmethod
+    def build_key(samples_number: int, samplerate: int, bands, factor: int, crossover: float, window_type: str,
+                  layout: str) -> tuple:
+        """Возвращает ключ, по которому анализ сравнивается с текущими настройками."""
+        return samples_number, samplerate, id(bands), len(bands), factor, crossover, window_type, layout
+
+    def skip(self, written: int) -> None:
+        """Пропускает накопленные данные захвата без децимации."""
+        self.cursor = written
+        self.decimator.reset()
+
+    def verify_warm(self) -> bool:
+        """Проверяет, что децимированных сэмплов накопилось на полное окно анализа."""
+        return self.ring_buffer.written >= self.window.size
+
+    def update(self, ring_buffer: RingBuffer, min_db: float = -80.0, eps: float = 1e-12) -> bool:
+        """Прореживает новые сэмплы кольцевого буфера захвата и пересчитывает уровни низких полос.
+
+        Возвращает False, если новых сэмплов нет. Если отставание больше половины буфера, старые сэмплы
+        пропускаются, а история фильтра сбрасывается.
+        """
+        written: int = ring_buffer.written
+        backlog: int = written - self.cursor
+        if backlog <= 0:
+            return False
+        if backlog > ring_buffer.capacity // 2:
+            backlog = ring_buffer.capacity // 2
+            self.decimator.reset()
+        self.ring_buffer.write(self.decimator.process(ring_buffer.read_span(written, backlog)))
+        self.cursor = written
+        if self.low.size and self.verify_warm():
+            window: np.ndarray = self.ring_buffer.read_latest(self.window.size, self.window)
+            np.copyto(self.levels, self.plan.get_levels(window, min_db, eps))
+        return True
+
+    def apply_levels(self, db_levels: np.ndarray) -> np.ndarray:
+        """Записывает в db_levels последние уровни dBFS низких полос, если децимированное окно уже накоплено."""
+        if self.low.size and self.verify_warm():
+            db_levels[self.low] = self.levels
+        return db_levels
@@ -0,0 +1,155 @@
+import os
+import struct
+from time import perf_counter
+from typing import Iterator
+import numpy as np
+
+from .base import Base
+from .spectrum import SpectralPlan
+
+
+class PcmSource:
+    """Источник PCM-данных из файла, отображённого в память через np.memmap (кадры × каналы)."""
+    __slots__ = ('path', 'samplerate', 'channels', 'samples')
+
+    wav_dtypes: dict = {
+        (1, 8): 'u1', (1, 16): '<i2', (1, 24): 'V3', (1, 32): '<i4', (3, 32): '<f4', (3, 64): '<f8'
+    }
+
+    def __init__(self, path: str, samplerate: int, channels: int, dtype: str, offset: int = 0, size: int | None = None):
+        self.path = path
+        self.samplerate = samplerate
+        self.channels = channels
+        item_size: int = np.dtype(dtype).itemsize * channels
+        available: int = os.path.getsize(path) - offset
+        size = available if size is None else min(size, available)
+        self.samples = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(size // item_size, channels))
+
+    @classmethod
+    def from_raw(cls, path: str, samplerate: int, channels: int, dtype: str = '<i2') -> 'PcmSource':
+        """Открывает файл сырого PCM без заголовка с заданными параметрами."""
+        return cls(path, samplerate, channels, dtype)
+
+    @classmethod
+    def from_wav(cls, path: str) -> 'PcmSource':
+        """Разбирает RIFF/WAVE заголовок и отображает в память блок data без чтения его в ОЗУ."""
+        with open(path, 'rb') as wav_file:
+            riff, _, wave = struct.unpack('<4sI4s', wav_file.read(12))
+            if riff != b'RIFF' or wave != b'WAVE':
+                raise ValueError(f'Файл не является WAV: {path}')
+            fmt: tuple | None = None
+            while True:
+                header: bytes = wav_file.read(8)
+                if len(header) < 8:
+                    raise ValueError(f'В WAV-файле не найден блок data: {path}')
+                chunk_id, chunk_size = struct.unpack('<4sI', header)
+                if chunk_id == b'fmt ':
+                    chunk: bytes = wav_file.read(chunk_size + (chunk_size & 1))
+                    tag, channels, samplerate, _, _, bits = struct.unpack('<HHIIHH', chunk[:16])
+                    if tag == 0xFFFE:
+                        tag = struct.unpack('<H', chunk[24:26])[0]
+                    fmt = (tag, channels, samplerate, bits)
+                elif chunk_id == b'data':
+                    offset: int = wav_file.tell()
+                    break
+                else:
+                    wav_file.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+
+        if fmt is None:
+            raise ValueError(f'В WAV-файле нет блока fmt перед data: {path}')
+        tag, channels, samplerate, bits = fmt
+        dtype: str | None = cls.wav_dtypes.get((tag, bits))
+        if dtype is None:
+            raise ValueError(f'Неподдерживаемый формат WAV (format tag {tag}, {bits} бит): {path}')
+        return cls(path, samplerate, channels, dtype, offset, chunk_size)
+
+    @staticmethod
+    def unpack_int24(block: np.ndarray) -> np.ndarray:
+        """Распаковывает 24-битные сэмплы little-endian (тип V3) в старшие байты int32, то есть в 32-битный PCM."""
+        packed: np.ndarray = np.ascontiguousarray(block).view(np.uint8).reshape(*block.shape, 3)
+        unpacked: np.ndarray = np.zeros((*block.shape, 4), dtype=np.uint8)
+        unpacked[..., 1:] = packed
+        return unpacked.view('<i4')[..., 0]
+
+    @staticmethod
+    def convert_to_mono(block: np.ndarray) -> np.ndarray:
+        """Преобразует блок PCM (кадры × каналы) в моно float32 в диапазоне [-1, 1]."""
+        if block.dtype.kind == 'V':
+            block = PcmSource.unpack_int24(block)
+        kind: str = block.dtype.kind
+        x: np.ndarray = block.astype(np.float32)
+        if kind == 'u':
+            x -= 128.0
+            x *= 1.0 / 128.0
+        elif kind == 'i':
+            x *= 1.0 / float(2 ** (8 * block.dtype.itemsize - 1))
+        if x.shape[1] > 1:
+            return x.mean(axis=1, dtype=np.float32)
+        return x[:, 0]
+
+    def get_mono(self, start: int, stop: int) -> np.ndarray:
+        """Возвращает отрезок [start, stop) в моно float32 в диапазоне [-1, 1]."""
+        return self.convert_to_mono(self.samples[start:stop])
+
+
+class OfflineAnalyzer(Base):
+    """Пакетный анализ записанного файла тем же планом полос, что и у живого потока, без аудиоустройства."""
+    __slots__ = ('source', 'hop', 'batch_frames', 'plan')
+
+    def __init__(self, source: PcmSource, batch_frames: int = 2048):
+        super().__init__()
+        self.source = source
+        self.hop = self.hop_size or self.samples_number
+        self.batch_frames = batch_frames
+        self.plan = SpectralPlan(self.samples_number, source.samplerate, self.bands, layout=self.band_layout)
+
+    def get_frames_number(self) -> int:
+        """Возвращает количество окон анализа в файле."""
+        total: int = self.source.samples.shape[0]
+        if total < self.samples_number:
+            return 0
+        return (total - self.samples_number) // self.hop + 1
+
+    @staticmethod
+    def analyze_signal(plan: SpectralPlan, signal: np.ndarray, hop: int, min_db: float, eps: float) -> np.ndarray:
+        """Нарезает моно-сигнал на окна с шагом hop и возвращает их уровни dBFS (окна × полосы, float32)."""
+        frames: np.ndarray = np.lib.stride_tricks.sliding_window_view(signal, plan.samples_number)[::hop]
+        return plan.get_levels(frames, min_db, eps, aggregate=None).astype(np.float32)
+
+    def iter_levels(self, min_db: float = -80.0, eps: float = 1e-12) -> Iterator[tuple[int, np.ndarray]]:
+        """Выдаёт пары (номер первого окна, уровни dBFS пакета окна × полосы) при постоянном объёме памяти."""
+        size: int = self.samples_number
+        hop: int = self.hop
+        frames_number: int = self.get_frames_number()
+        for first in range(0, frames_number, self.batch_frames):
+            count: int = min(self.batch_frames, frames_number - first)
+            start: int = first * hop
+            signal: np.ndarray = self.source.get_mono(start, start + (count - 1) * hop + size)
+            yield first, self.analyze_signal(self.plan, signal, hop, min_db, eps)
+
+    def export(self, path: str) -> int:
+        """Записывает временной ряд уровней полос в .npy (float32, окна × полосы) или CSV; возвращает число окон."""
+        frames_number: int = self.get_frames_number()
+        started: float = perf_counter()
+        if path.endswith('.npy'):
+            output: np.ndarray = np.lib.format.open_memmap(
+                path, mode='w+', dtype=np.float32, shape=(frames_number, len(self.bands))
+            )
+            for first, levels in self.iter_levels():
+                output[first:first + levels.shape[0]] = levels
+            output.flush()
+        else:
+            with open(path, 'w', encoding='UTF-8') as csv_file:
+                header: str = ','.join(f'{low:g}-{high:g}' for low, high in self.bands)
+                csv_file.write(f'time,{header}\n')
+                for first, levels in self.iter_levels():
+                    times: np.ndarray = np.arange(first, first + levels.shape[0]) * (self.hop / self.source.samplerate)
+                    np.savetxt(csv_file, np.column_stack((times, levels)), fmt='%.4f', delimiter=',')
+
+        elapsed: float = perf_counter() - started
+        duration: float = self.source.samples.shape[0] / float(self.source.samplerate)
+        self.logger.info(
+            'Анализ файла %s завершён: окон %s, длительность %.1f с, время %.2f с, ускорение x%.1f',
+            self.source.path, frames_number, duration, elapsed, duration / max(elapsed, 1e-9)
+        )
+        return frames_number
@@ -0,0 +1,214 @@
+import os
+import sys
+import stat
+import socket
+import struct
+from abc import ABC, abstractmethod
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+
+FRAME_HEADER = struct.Struct('<4sIdHH')
+FRAME_MAGIC = b'AVB1'
+RING_HEADER = struct.Struct('<4sIIIQ')
+RING_MAGIC = b'AVR1'
+SLOT_HEADER = struct.Struct('<Qd')
+
+
+def pack_frame(sequence: int, timestamp: float, levels: np.ndarray) -> bytes:
+    """Упаковывает кадр: заголовок (магия, номер, время, число полос) и уровни полос float32 little-endian."""
+    header: bytes = FRAME_HEADER.pack(FRAME_MAGIC, sequence & 0xFFFFFFFF, timestamp, levels.size, 0)
+    return header + levels.astype('<f4', copy=False).tobytes()
+
+
+class Publisher(ABC):
+    """Абстрактный публикатор кадров уровней полос; публикация никогда не блокирует поток анализа."""
+    __slots__ = ('sequence', 'dropped')
+
+    def __init__(self):
+        self.sequence = 0
+        self.dropped = 0
+
+    def publish(self, band_levels: list[float], timestamp: float) -> None:
+        """Публикует вектор уровней полос."""
+        levels: np.ndarray = np.asarray(band_levels, dtype=np.float32)
+        self.send(levels, timestamp)
+        self.sequence += 1
+
+    @abstractmethod
+    def send(self, levels: np.ndarray, timestamp: float) -> None:
+        """Отправляет кадр с уровнями полос float32 и временем захвата, не блокируя поток анализа."""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Освобождает канал публикации."""
+
+
+class StreamPublisher(Publisher):
+    """Публикует кадры в неблокирующий файловый дескриптор (stdout); пока не ушёл прошлый кадр, новые пропускаются."""
+    __slots__ = ('fd', 'pending')
+
+    def __init__(self, fd: int):
+        super().__init__()
+        self.fd = fd
+        self.pending = b''
+        os.set_blocking(fd, False)
+
+    def send(self, levels: np.ndarray, timestamp: float) -> None:
+        """Дописывает остаток прошлого кадра, а новый кадр отправляет только в свободный канал.
+
+        Переполненный канал пропускает кадр; закрытый получателем (BrokenPipeError и другие OSError) — кидает ошибку.
+        """
+        try:
+            if self.pending:
+                self.pending = self.pending[os.write(self.fd, self.pending):]
+            if self.pending:
+                self.dropped += 1
+                return None
+            frame: bytes = pack_frame(self.sequence, timestamp, levels)
+            self.pending = frame[os.write(self.fd, frame):]
+        except BlockingIOError:
+            self.dropped += 1
+
+    def close(self) -> None:
+        """Возвращает дескриптору блокирующий режим."""
+        os.set_blocking(self.fd, True)
+
+
+class SocketPublisher(Publisher):
+    """Сервер на UNIX-сокете для нескольких подписчиков: медленные получают прореженный поток или отключаются."""
+    __slots__ = ('path', 'server', 'subscribers', 'max_pending')
+
+    def __init__(self, path: str, max_pending: int = 64 * 1024):
+        super().__init__()
+        self.path = path
+        self.max_pending = max_pending
+        self.remove_stale_socket(path)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(path)
+        self.server.listen()
+        self.server.setblocking(False)
+        self.subscribers = {}
+
+    @staticmethod
+    def remove_stale_socket(path: str) -> None:
+        """Удаляет сокет, оставшийся от завершившегося экземпляра; иначе на месте другого файла кидает ошибку."""
+        try:
+            mode: int = os.stat(path).st_mode
+        except FileNotFoundError:
+            return None
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError(f'По пути публикации уже есть файл, который не является сокетом: {path}')
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(path)
+            return None
+        finally:
+            probe.close()
+        raise FileExistsError(f'Сокет публикации уже обслуживает другой экземпляр: {path}')
+
+    def _accept_subscribers(self) -> None:
+        """Принимает всех ожидающих подписчиков без блокировки."""
+        while True:
+            try:
+                connection, _ = self.server.accept()
+            except BlockingIOError:
+                return None
+            connection.setblocking(False)
+            self.subscribers[connection] = b''
+
+    def send(self, levels: np.ndarray, timestamp: float) -> None:
+        """Отправляет кадр каждому подписчику; подписчику с недоставленным хвостом кадр не отправляется."""
+        self._accept_subscribers()
+        frame: bytes = pack_frame(self.sequence, timestamp, levels)
+        for connection, pending in list(self.subscribers.items()):
+            try:
+                if pending:
+                    pending = pending[connection.send(pending):]
+                    self.dropped += 1
+                else:
+                    pending = frame[connection.send(frame):]
+            except BlockingIOError:
+                pending = pending or frame
+                self.dropped += 1
+            except OSError:
+                self._drop_subscriber(connection)
+                continue
+            if len(pending) > self.max_pending:
+                self._drop_subscriber(connection)
+            else:
+                self.subscribers[connection] = pending
+
+    def _drop_subscriber(self, connection: socket.socket) -> None:
+        """Закрывает соединение подписчика."""
+        self.subscribers.pop(connection, None)
+        connection.close()
+
+    def close(self) -> None:
+        """Отключает подписчиков, закрывает сервер и удаляет файл сокета."""
+        for connection in list(self.subscribers):
+            self._drop_subscriber(connection)
+        self.server.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class SharedMemoryPublisher(Publisher):
+    """Кольцо кадров в разделяемой памяти (/dev/shm/<name>), которое локальные читатели отображают через mmap.
+
+    Заголовок: магия, число слотов, число полос, размер слота, номер последнего записанного кадра.
+    Слот: номер кадра, время и уровни полос float32. Читатель берёт слот номер % слотов и сверяет номер
+    кадра в слоте до и после чтения; писатель никогда не ждёт читателей.
+    """
+    __slots__ = ('memory', 'slots', 'bands_number', 'slot_size', 'rows')
+
+    def __init__(self, name: str, bands_number: int, slots: int = 64):
+        super().__init__()
+        self.slots = slots
+        self.bands_number = bands_number
+        self.slot_size = SLOT_HEADER.size + 4 * bands_number
+        try:
+            self.memory = SharedMemory(name=name, create=True, size=RING_HEADER.size + slots * self.slot_size)
+        except FileExistsError:
+            raise FileExistsError(
+                f'Сегмент разделяемой памяти {name} уже существует: его может читать другой экземпляр. '
+                f'Выберите другое имя или удалите /dev/shm/{name}, если он остался от завершившегося экземпляра.'
+            ) from None
+        RING_HEADER.pack_into(self.memory.buf, 0, RING_MAGIC, slots, bands_number, self.slot_size, 0)
+        self.rows = [
+            np.ndarray(bands_number, dtype='<f4', buffer=self.memory.buf,
+                       offset=RING_HEADER.size + i * self.slot_size + SLOT_HEADER.size)
+            for i in range(slots)
+        ]
+
+    def send(self, levels: np.ndarray, timestamp: float) -> None:
+        """Записывает кадр в следующий слот и затем публикует его номер в заголовке."""
+        if levels.size != self.bands_number:
+            self.dropped += 1
+            return None
+        sequence: int = self.sequence + 1
+        index: int = sequence % self.slots
+        offset: int = RING_HEADER.size + index * self.slot_size
+        SLOT_HEADER.pack_into(self.memory.buf, offset, 0, timestamp)
+        self.rows[index][:] = levels
+        SLOT_HEADER.pack_into(self.memory.buf, offset, sequence, timestamp)
+        struct.pack_into('<Q', self.memory.buf, RING_HEADER.size - 8, sequence)
+
+    def close(self) -> None:
+        """Закрывает и удаляет сегмент разделяемой памяти."""
+        self.rows = []
+        self.memory.close()
+        self.memory.unlink()
+
+
+def create_publisher(target: str, bands_number: int) -> Publisher:
+    """Создаёт публикатор по строке назначения: stdout, unix:/путь/к/сокету или shm:имя."""
+    if target == 'stdout':
+        sys.stdout.flush()
+        return StreamPublisher(sys.stdout.fileno())
+    if target.startswith('unix:'):
+        return SocketPublisher(target[len('unix:'):])
+    if target.startswith('shm:'):
+        return SharedMemoryPublisher(target[len('shm:'):], bands_number)
+    raise ValueError(f'Неизвестное назначение публикации: {target}')
@@ -0,0 +1,126 @@
+import struct
+from time import monotonic
+from queue import SimpleQueue
+from threading import Thread
+from typing import Iterator
+import numpy as np
+
+SESSION_HEADER = struct.Struct('<4sHH')
+SESSION_MAGIC = b'AVS1'
+SESSION_VERSION = 1
+BLOCK_HEADER = struct.Struct('<dIHHII')
+
+
+class CallbackStatus:
+    """Флаги PortAudio записанного блока в том же виде, что и sounddevice.CallbackFlags."""
+    __slots__ = ('flags',)
+
+    def __init__(self, flags: int = 0):
+        self.flags = flags
+
+    def __bool__(self) -> bool:
+        return self.flags != 0
+
+    @property
+    def input_underflow(self) -> bool:
+        return bool(self.flags & 0x1)
+
+    @property
+    def input_overflow(self) -> bool:
+        return bool(self.flags & 0x2)
+
+
+def get_status_flags(status) -> int:
+    """Возвращает битовую маску флагов PortAudio из sounddevice.CallbackFlags или CallbackStatus."""
+    if not status:
+        return 0
+    flags = getattr(status, '_flags', None)
+    if flags is None:
+        flags = getattr(status, 'flags', 0)
+    return int(flags) & 0xFFFF
+
+
+class BlockRecorder:
+    """Запись блоков callback в файл сеанса только дописыванием; на диск пишет фоновый поток.
+
+    Файл начинается с заголовка (магия AVS1, версия); запись блока — заголовок (время от начала записи, кадры,
+    каналы, флаги PortAudio, частота дискретизации) и сэмплы float32 (кадры × каналы), всё little-endian.
+    Callback только копирует блок в очередь и никогда не ждёт диска;
+    при переполнении очереди блоки отбрасываются и учитываются в dropped.
+    """
+    __slots__ = ('path', 'file', 'queue', 'thread', 'started', 'max_pending', 'queued', 'recorded', 'dropped')
+
+    def __init__(self, path: str, max_pending: int = 1024):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.file.write(SESSION_HEADER.pack(SESSION_MAGIC, SESSION_VERSION, 0))
+        self.queue = SimpleQueue()
+        self.started = monotonic()
+        self.max_pending = max_pending
+        self.queued = 0
+        self.recorded = 0
+        self.dropped = 0
+        self.thread = Thread(target=self._write_blocks, name='recorder', daemon=True)
+        self.thread.start()
+
+    def record(self, block: np.ndarray, status, samplerate: int) -> None:
+        """Ставит копию блока в очередь записи; вызывается из callback аудиопотока."""
+        if self.queued - self.recorded >= self.max_pending:
+            self.dropped += 1
+            return None
+        frames: int = block.shape[0]
+        channels: int = block.shape[1] if block.ndim > 1 else 1
+        header: bytes = BLOCK_HEADER.pack(
+            monotonic() - self.started, frames, channels, get_status_flags(status), samplerate, 0
+        )
+        self.queued += 1
+        self.queue.put(header + block.astype(np.float32, copy=False).tobytes())
+
+    def _write_blocks(self) -> None:
+        """Дописывает блоки из очереди в файл, пока не получит None."""
+        while True:
+            record: bytes | None = self.queue.get()
+            if record is None:
+                break
+            self.file.write(record)
+            self.recorded += 1
+        self.file.flush()
+
+    def close(self) -> None:
+        """Дописывает оставшиеся блоки и закрывает файл."""
+        self.queue.put(None)
+        self.thread.join()
+        self.file.close()
+
+
+class ReplaySource:
+    """Файл сеанса, записанный BlockRecorder, как источник блоков для повторного анализа."""
+    __slots__ = ('path', 'data')
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data = np.memmap(path, dtype=np.uint8, mode='r')
+        if self.data.size < SESSION_HEADER.size:
+            raise ValueError(f'Файл сеанса пуст: {path}')
+        magic, version, _ = SESSION_HEADER.unpack_from(self.data, 0)
+        if magic != SESSION_MAGIC or version != SESSION_VERSION:
+            raise ValueError(f'Файл не является записью сеанса: {path}')
+
+    def iter_blocks(self) -> Iterator[tuple[float, np.ndarray, CallbackStatus, int]]:
+        """Выдаёт (время, блок кадры × каналы, флаги, частота дискретизации) без копирования сэмплов."""
+        offset: int = SESSION_HEADER.size
+        while offset + BLOCK_HEADER.size <= self.data.size:
+            timestamp, frames, channels, flags, samplerate, _ = BLOCK_HEADER.unpack_from(self.data, offset)
+            offset += BLOCK_HEADER.size
+            size: int = frames * channels * 4
+            if offset + size > self.data.size:
+                break
+            block: np.ndarray = self.data[offset:offset + size].view(np.float32).reshape(frames, channels)
+            offset += size
+            yield timestamp, block, CallbackStatus(flags), samplerate
+
+    def get_samplerate(self) -> int | None:
+        """Возвращает частоту дискретизации первого блока или None для пустой записи."""
+        for _, _, _, samplerate in self.iter_blocks():
+            return samplerate
+        return None
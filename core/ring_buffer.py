@@ -0,0 +1,71 @@
+import numpy as np
+
+
+class RingBuffer:
+    """Предвыделенный кольцевой буфер float32 для одного писателя (callback) и одного читателя (анализатор)."""
+    __slots__ = ('capacity', 'buffer', 'written', 'block_power')
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError(f'Ёмкость кольцевого буфера должна быть положительной: {capacity}')
+        self.capacity = capacity
+        self.buffer = np.zeros(capacity, dtype=np.float32)
+        self.written = 0
+        self.block_power = 0.0
+
+    @staticmethod
+    def _downmix(source: np.ndarray, target: np.ndarray) -> None:
+        """Сводит блок в моно суммированием каналов прямо в срез буфера без промежуточных массивов."""
+        if source.ndim == 1:
+            np.copyto(target, source, casting='unsafe')
+            return None
+        channels: int = source.shape[1]
+        np.copyto(target, source[:, 0], casting='unsafe')
+        for channel in range(1, channels):
+            np.add(target, source[:, channel], out=target, casting='unsafe')
+        if channels > 1:
+            np.multiply(target, np.float32(1.0 / channels), out=target)
+
+    def write(self, block: np.ndarray) -> None:
+        """Записывает блок (кадры × каналы или моно) после курсора записи, сдвигает курсор и считает мощность блока."""
+        frames: int = block.shape[0]
+        if frames == 0:
+            self.block_power = 0.0
+            return None
+        if frames > self.capacity:
+            self.written += frames - self.capacity
+            block = block[-self.capacity:]
+            frames = self.capacity
+
+        position: int = self.written % self.capacity
+        first: int = min(frames, self.capacity - position)
+        head: np.ndarray = self.buffer[position:position + first]
+        self._downmix(block[:first], head)
+        energy: float = float(np.dot(head, head))
+        if first < frames:
+            tail: np.ndarray = self.buffer[:frames - first]
+            self._downmix(block[first:], tail)
+            energy += float(np.dot(tail, tail))
+        self.block_power = energy / frames
+        self.written += frames
+
+    def read_span(self, end: int, size: int, out: np.ndarray | None = None) -> np.ndarray:
+        """Возвращает size сэмплов, заканчивающихся абсолютной позицией end: view или одну копию через край.
+
+        При переходе через край копия пишется в out (массив длины size), если он передан, иначе выделяется.
+        """
+        if size > self.capacity:
+            raise ValueError(f'Запрошено {size} сэмплов при ёмкости кольцевого буфера {self.capacity}')
+        stop: int = end % self.capacity
+        start: int = stop - size
+        if start >= 0:
+            return self.buffer[start:stop]
+        if out is None:
+            return np.concatenate((self.buffer[start:], self.buffer[:stop]))
+        np.copyto(out[:-start], self.buffer[start:])
+        np.copyto(out[-start:], self.buffer[:stop])
+        return out
+
+    def read_latest(self, size: int, out: np.ndarray | None = None) -> np.ndarray:
+        """Возвращает последние size сэмплов: view без копирования или одну копию при переходе через край."""
+        return self.read_span(self.written, size, out)
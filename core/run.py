@@ -1,37 +1,323 @@
-from time import sleep
-from threading import Thread, Lock
+import sys
+import signal
+import asyncio
+from functools import partial
+from time import monotonic, perf_counter
 
 from .audio_processor import Analyzer
+from .device_watcher import DeviceWatcher
+from .scheduler import FrameScheduler
+from .settings import Settings, RESTART_FIELDS
 
 
 class RunProgram(Analyzer):
-    __slots__ = ('locker', 'running', 'fps')
+    __slots__ = (
+        'running', 'scheduler', 'published_levels', 'publisher', 'levels_ready', 'stopped', 'idle', 'device_changed',
+        'replay', 'replay_realtime', 'headless'
+    )
 
     def __init__(self):
         super().__init__()
-        self.locker = Lock()
         self.running = True
-        self.fps = 10
-
-    def wait_for_enter(self, stdscr) -> None:
-        """Ждёт нажатия клавиши и устанавливает флаг остановки."""
-        stdscr.getch()
-        self.running: bool = False
-
-    def create_main_loop(self, stdscr) -> None:
-        """Запускает все модули программы в цикле."""
-        while self.running:
-            with self.locker:
-                counter: int = 0
-                band_levels: list[float] = self.get_band_levels()
-                for i in range(len(band_levels)):
-                    Thread(target=self.safe_wrapper, args=(self.create_band, band_levels[i], self.x + counter)).start()
-                    counter += len(band_levels) - 1
-                stdscr.refresh()
-                sleep(1.0 / max(1, self.fps))
-
-    def create_wrapped_threads(self) -> None:
-        """Запускает потоки."""
-        self.safe_wrapper(self.init_curses, None)
-        Thread(target=self.safe_wrapper, args=(self.wait_for_enter, None)).start()
-        self.safe_wrapper(self.create_main_loop, None)
+        self.scheduler = FrameScheduler(self.fps)
+        self.published_levels = ([0.0] * self.get_bands_number(), self.capture_time)
+        self.publisher = None
+        self.levels_ready = None
+        self.stopped = None
+        self.idle = False
+        self.device_changed = None
+        self.replay = None
+        self.replay_realtime = True
+        self.headless = False
+
+    def stop(self, reason: str | None = None) -> None:
+        """Останавливает цикл событий без ожидания очередного кадра."""
+        if reason is not None:
+            self.logger.info('Задействован обработчик сигналов для корректного завершения: %s', reason)
+        self.running = False
+        if self.stopped is not None:
+            self.stopped.set()
+
+    def handle_keys(self, stdscr) -> None:
+        """Разбирает все накопленные нажатия: изменение размера терминала перерисовывает экран, иначе выход."""
+        while True:
+            key: int = stdscr.getch()
+            if key == -1:
+                return None
+            if self.verify_resize_key(key):
+                self.drawn_cells = None
+                continue
+            self.stop()
+            return None
+
+    def log_stats(self) -> None:
+        """Выводит в лог статистику кадров и счётчики инструментирования."""
+        self.logger.info(
+            'Статистика кадров: %s; инструментирование: %s',
+            self.scheduler.get_stats(), self.instrumentation.get_stats()
+        )
+
+    def verify_idle_mode(self) -> bool:
+        """Переключает режим простоя по затянувшейся тишине; при входе в него один раз публикует нулевые уровни."""
+        if not self.verify_idle():
+            if self.idle:
+                self.idle = False
+                self.logger.debug('Сигнал вернулся, полная частота кадров: %s', self.fps)
+            return False
+        self.skip_samples()
+        if not self.idle:
+            self.idle = True
+            self.published_levels = ([0.0] * self.get_bands_number(), self.capture_time)
+            self.levels_ready.set()
+            self.logger.debug('Тишина дольше %s с, частота простоя: %s', self.silence_timeout, self.idle_fps)
+        return True
+
+    async def analyze_blocks(self) -> None:
+        """Анализирует данные по уведомлениям callback аудиопотока и публикует последний вектор уровней полос.
+
+        В режиме простоя FFT и перерисовка пропускаются, а подписчикам уходят нулевые уровни с частотой idle_fps.
+        """
+        while True:
+            await self.data_ready.wait()
+            self.data_ready.clear()
+            self.analyze_frame()
+
+    def analyze_frame(self) -> None:
+        """Анализирует накопленные данные, публикует вектор уровней полос и будит отрисовку."""
+        if self.verify_idle_mode():
+            self.publish_levels(self.published_levels[0], self.capture_time)
+            return None
+        capture_time: float = self.capture_time
+        self.published_levels = (self.get_band_levels(), capture_time)
+        self.publish_levels(*self.published_levels)
+        if self.instrumentation.verify_export():
+            self.log_stats()
+        self.levels_ready.set()
+
+    def publish_levels(self, band_levels: list[float], timestamp: float) -> None:
+        """Публикует уровни полос; если получатель закрыл канал, закрывает публикацию, а без экрана — и программу."""
+        if self.publisher is None:
+            return None
+        try:
+            self.publisher.publish(band_levels, timestamp)
+        except OSError as e:
+            self.logger.warning('Получатель публикации отключился, публикация остановлена: %s', e)
+            self.close_publisher()
+            if self.headless:
+                self.stop()
+
+    def close_publisher(self) -> None:
+        """Закрывает публикатор и пишет в лог счётчики кадров."""
+        publisher = self.publisher
+        if publisher is None:
+            return None
+        self.publisher = None
+        try:
+            publisher.close()
+        except OSError as e:
+            self.logger.debug('Не удалось корректно закрыть публикатор: %s', e)
+        self.logger.info('Публикация завершена: кадров %d, пропущено %d', publisher.sequence, publisher.dropped)
+
+    async def replay_session(self) -> None:
+        """Подаёт блоки записанного сеанса в callback аудиопотока вместо устройства и завершает работу в конце записи.
+
+        В реальном времени блоки идут с записанными интервалами и анализируются по уведомлениям, как при захвате.
+        В ускоренном режиме каждый блок анализируется сразу после записи в кольцевой буфер, поэтому результат
+        не зависит от скорости машины.
+        """
+        started: float = monotonic()
+        blocks: int = 0
+        self.notify_pending = not self.replay_realtime
+        try:
+            for timestamp, block, status, samplerate in self.replay.iter_blocks():
+                if samplerate != self.samplerate:
+                    self.samplerate = samplerate
+                    self.create_buffers()
+                if self.replay_realtime:
+                    await asyncio.sleep(max(0.0, started + timestamp - monotonic()))
+                    self._audio_callback(block, block.shape[0], None, status)
+                else:
+                    self._audio_callback(block, block.shape[0], None, status)
+                    self.analyze_frame()
+                    if blocks % 16 == 0:
+                        await asyncio.sleep(0)
+                blocks += 1
+            await asyncio.sleep(0)
+        finally:
+            self.notify_pending = False
+        self.logger.info(
+            'Воспроизведение записи %s завершено: блоков %d за %.2f с', self.replay.path, blocks, monotonic() - started
+        )
+        self.stop()
+
+    async def render_frames(self, stdscr) -> None:
+        """Отрисовывает опубликованные уровни не чаще дедлайнов планировщика и спит, пока новых уровней нет."""
+        self.scheduler.start()
+        drawn_capture_time: float = self.capture_time
+        while True:
+            if not self.levels_ready.is_set():
+                await self.levels_ready.wait()
+                self.scheduler.resume()
+            self.levels_ready.clear()
+            band_levels, capture_time = self.published_levels
+            started: float = perf_counter()
+            peak_levels: list[float] | None = self.get_peak_levels() if self.peak_hold_ms and not self.idle else None
+            self.draw_frame(stdscr, band_levels, peak_levels, max(1, len(self.sources)))
+            if self.instrumentation.enabled:
+                self.instrumentation.render_time.record(perf_counter() - started)
+            if capture_time != drawn_capture_time:
+                latency: float = monotonic() - capture_time
+                self.scheduler.record_latency(latency)
+                if self.instrumentation.enabled:
+                    self.instrumentation.display_latency.record(latency)
+                drawn_capture_time = capture_time
+            self.handle_keys(stdscr)
+            await asyncio.sleep(self.scheduler.get_delay())
+
+    async def watch_devices(self) -> None:
+        """Переподключает поток при смене устройства по событиям PulseAudio или при остановке потока.
+
+        События приходят из подписки DeviceWatcher и собираются за 200 мс; раз в device_check_interval секунд
+        дешёвая проверка без обращения к PulseAudio замечает остановившийся поток. Интервал читается заново
+        на каждом шаге, поэтому его правка в config.json действует без перезапуска; если без подписки проверка
+        выключена, задача ждёт её включения с периодом проверки config.json.
+        """
+        watcher = DeviceWatcher(partial(asyncio.get_running_loop().call_soon_threadsafe, self.device_changed.set))
+        subscribed: bool = watcher.start()
+        try:
+            while True:
+                interval: float | None = self.device_check_interval or None
+                if not subscribed and interval is None:
+                    if not self.config_check_interval:
+                        return None
+                    await asyncio.sleep(self.config_check_interval)
+                    continue
+                try:
+                    await asyncio.wait_for(self.device_changed.wait(), interval)
+                except asyncio.TimeoutError:
+                    pass
+                check_sink: bool = self.device_changed.is_set()
+                if check_sink:
+                    await asyncio.sleep(0.2)
+                    self.device_changed.clear()
+                reason: str | None = self.verify_device_change(check_sink)
+                if reason is None:
+                    continue
+                try:
+                    self.reconnect_stream(reason)
+                except Exception:
+                    self.logger.exception('Не удалось переподключить аудиопоток; повторю при следующей проверке.')
+        finally:
+            watcher.stop()
+
+    def reload_settings(self, settings: Settings) -> None:
+        """Применяет новые настройки между кадрами; план анализа и шкала перестраиваются при следующем кадре.
+
+        Настройки, требующие нового аудиопотока (устройство, каналы, размер блока, буфер, источники),
+        остаются прежними до перезапуска.
+        """
+        changes: list[str] = self.settings.get_changes(settings)
+        postponed: list[str] = [name for name in changes if name in RESTART_FIELDS]
+        for name in postponed:
+            setattr(settings, name, getattr(self.settings, name))
+        if postponed:
+            self.logger.warning('Настройки применятся после перезапуска: %s', ', '.join(postponed))
+        changes = [name for name in changes if name not in RESTART_FIELDS]
+        if not changes:
+            return None
+        self.apply_settings(settings)
+        self.silence_power = 10.0 ** (self.silence_threshold / 10.0)
+        self.idle_period = 1.0 / self.idle_fps if self.idle_fps > 0 else float('inf')
+        self.instrumentation.enabled = bool(self.stats_enabled)
+        self.instrumentation.interval = float(self.stats_interval or 0)
+        self.scheduler.set_fps(self.fps)
+        if 'hop_size' in changes:
+            self.frame_end = self.ring_buffer.written
+        self.stft_levels = None
+        self.dynamics = None
+        self.source_batch = None
+        self.drawn_cells = None
+        self.logger.info('Настройки применены без перезапуска: %s', ', '.join(changes))
+
+    async def watch_config(self) -> None:
+        """Раз в config_check_interval секунд сравнивает время изменения config.json и применяет новые настройки.
+
+        Файл с ошибкой отвергается целиком: в лог пишется причина, а программа продолжает с прежними настройками.
+        """
+        while self.config_check_interval:
+            await asyncio.sleep(self.config_check_interval)
+            try:
+                settings: Settings | None = self.load_changed_settings()
+            except (OSError, ValueError) as e:
+                self.logger.error('Изменённый config.json отвергнут, остаются прежние настройки: %s', e)
+                continue
+            if settings is not None:
+                self.reload_settings(settings)
+
+    def handle_task_done(self, task: asyncio.Task) -> None:
+        """Пишет в лог исключение упавшей задачи цикла событий и останавливает программу."""
+        if task.cancelled() or task.exception() is None:
+            return None
+        self.logger.error(
+            'Задача %s завершилась с ошибкой, программа остановлена.', task.get_name(), exc_info=task.exception()
+        )
+        self.stop()
+
+    async def create_event_loop(self, stdscr=None) -> None:
+        """Работает в цикле событий: анализ по данным, отрисовка по таймеру, клавиши и сигналы через селектор."""
+        loop = asyncio.get_running_loop()
+        self.headless = stdscr is None
+        self.data_ready = asyncio.Event()
+        self.levels_ready = asyncio.Event()
+        self.stopped = asyncio.Event()
+        self.device_changed = asyncio.Event()
+        signals: list[int] = [getattr(signal, n) for n in ('SIGHUP', 'SIGINT', 'SIGTERM') if hasattr(signal, n)]
+        for signum in signals:
+            loop.add_signal_handler(signum, self.stop, signal.Signals(signum).name)
+        if hasattr(signal, 'SIGUSR1'):
+            signals.append(signal.SIGUSR1)
+            loop.add_signal_handler(signal.SIGUSR1, self.log_stats)
+        tasks: list[asyncio.Task] = [
+            asyncio.create_task(self.analyze_blocks(), name='analyze_blocks'),
+            asyncio.create_task(self.watch_config(), name='watch_config')
+        ]
+        if self.replay is not None:
+            tasks.append(asyncio.create_task(self.replay_session(), name='replay_session'))
+        elif not self.sources:
+            tasks.append(asyncio.create_task(self.watch_devices(), name='watch_devices'))
+        if stdscr is not None:
+            stdscr.nodelay(True)
+            loop.add_reader(sys.stdin.fileno(), self.handle_keys, stdscr)
+            tasks.append(asyncio.create_task(self.render_frames(stdscr), name='render_frames'))
+        for task in tasks:
+            task.add_done_callback(self.handle_task_done)
+        self.loop = loop
+        try:
+            if self.running:
+                await self.stopped.wait()
+        finally:
+            self.loop = None
+            self.notify_pending = False
+            self.running = False
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if stdscr is not None:
+                loop.remove_reader(sys.stdin.fileno())
+            for signum in signals:
+                loop.remove_signal_handler(signum)
+            self.close_publisher()
+            self.log_stats()
+
+    def run_curses(self, stdscr) -> None:
+        """Инициализирует экран и запускает цикл событий в рамках одного curses.wrapper."""
+        self.init_curses(stdscr)
+        asyncio.run(self.create_event_loop(stdscr))
+
+    def create_wrapped_loop(self) -> None:
+        """Запускает цикл событий внутри curses.wrapper."""
+        self.safe_wrapper(self.run_curses)
+
+    def create_headless_loop(self) -> None:
+        """Запускает цикл событий без curses: уровни полос только публикуются."""
+        asyncio.run(self.create_event_loop())
@@ -0,0 +1,67 @@
+from time import monotonic
+
+
+class FrameScheduler:
+    """Планировщик кадров по абсолютным дедлайнам монотонных часов с пропуском кадров при отставании."""
+    __slots__ = (
+        'period', 'started', 'next_deadline', 'frames', 'missed', 'skipped',
+        'latency_total', 'latency_max', 'latency_count'
+    )
+
+    def __init__(self, fps: int):
+        self.period = 1.0 / max(1, fps)
+        self.start()
+
+    def start(self) -> None:
+        """Сбрасывает счётчики и отсчитывает дедлайны от текущего момента."""
+        self.started = monotonic()
+        self.next_deadline = self.started
+        self.frames = 0
+        self.missed = 0
+        self.skipped = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.latency_count = 0
+
+    def set_fps(self, fps: int) -> None:
+        """Меняет частоту кадров, отсчитывая следующий дедлайн от текущего момента."""
+        self.period = 1.0 / max(1, fps)
+        self.next_deadline = monotonic() + self.period
+
+    def resume(self) -> None:
+        """Переносит дедлайн кадра на текущий момент после простоя без новых данных, не считая его пропуском."""
+        now: float = monotonic()
+        if self.next_deadline < now:
+            self.next_deadline = now
+
+    def get_delay(self) -> float:
+        """Учитывает выведенный кадр и возвращает время до следующего дедлайна; просроченные кадры пропускаются."""
+        self.frames += 1
+        self.next_deadline += self.period
+        delay: float = self.next_deadline - monotonic()
+        if delay > 0.0:
+            return delay
+        behind: int = int(-delay // self.period)
+        self.missed += 1
+        self.skipped += behind
+        self.next_deadline += behind * self.period
+        return 0.0
+
+    def record_latency(self, latency: float) -> None:
+        """Учитывает задержку от callback аудиопотока до вывода кадра на экран."""
+        self.latency_total += latency
+        self.latency_count += 1
+        if latency > self.latency_max:
+            self.latency_max = latency
+
+    def get_stats(self) -> dict:
+        """Возвращает счётчики кадров, достигнутую частоту и задержку в миллисекундах."""
+        elapsed: float = monotonic() - self.started
+        return {
+            'frames': self.frames,
+            'missed_deadlines': self.missed,
+            'skipped_frames': self.skipped,
+            'achieved_fps': round(self.frames / elapsed, 2) if elapsed > 0.0 else 0.0,
+            'latency_avg_ms': round(1000.0 * self.latency_total / max(1, self.latency_count), 2),
+            'latency_max_ms': round(1000.0 * self.latency_max, 2),
+        }
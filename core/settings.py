@@ -0,0 +1,160 @@
+import numpy as np
+
+from .spectrum import FREQUENCY_SCALES, generate_bands
+
+RESTART_FIELDS: tuple[str, ...] = (
+    'device', 'channels_number', 'samples_number', 'blocksize', 'latency', 'maxsize', 'source_devices'
+)
+
+
+def verify_number(key: str, value, minimum: float | None = None, integer: bool = False):
+    """Возвращает число из настройки или кидает ValueError, если это не число, не целое или меньше minimum."""
+    if isinstance(value, bool) or not isinstance(value, int if integer else (int, float)):
+        kind: str = 'целым числом' if integer else 'числом'
+        raise ValueError(f'Настройка {key} должна быть {kind}, получено: {value!r}')
+    if minimum is not None and value < minimum:
+        raise ValueError(f'Настройка {key} должна быть не меньше {minimum}, получено: {value!r}')
+    return value
+
+
+def verify_choice(key: str, value, choices: tuple) -> str:
+    """Возвращает значение настройки, если оно входит в choices, иначе кидает ValueError."""
+    if value not in choices:
+        raise ValueError(f'Настройка {key} должна быть одним из {", ".join(map(str, choices))}, получено: {value!r}')
+    return value
+
+
+def verify_flag(key: str, value) -> bool:
+    """Возвращает логическое значение настройки или кидает ValueError."""
+    if not isinstance(value, bool):
+        raise ValueError(f'Настройка {key} должна быть true или false, получено: {value!r}')
+    return value
+
+
+def compile_bands(bands) -> np.ndarray:
+    """Возвращает границы полос массивом (полосы × 2) или кидает ValueError для пустого списка и пар low >= high."""
+    try:
+        edges: np.ndarray = np.array(bands, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError(f'Настройка bands должна быть списком пар [low, high], получено: {bands!r}')
+    if edges.ndim != 2 or edges.shape[0] == 0 or edges.shape[1] != 2:
+        raise ValueError(f'Настройка bands должна быть непустым списком пар [low, high], получено: {bands!r}')
+    wrong: np.ndarray = np.flatnonzero(~((edges[:, 0] >= 0.0) & (edges[:, 0] < edges[:, 1])))
+    if wrong.size:
+        raise ValueError(f'Полоса {int(wrong[0])} в настройке bands должна иметь 0 <= low < high: {bands[wrong[0]]!r}')
+    edges.flags.writeable = False
+    return edges
+
+
+def compile_levels(levels) -> np.ndarray:
+    """Возвращает пороги цветов массивом или кидает ValueError, если они не возрастают в пределах 0–100."""
+    try:
+        thresholds: np.ndarray = np.array(levels, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError(f'Настройка bands_levels должна быть списком чисел, получено: {levels!r}')
+    if thresholds.ndim != 1 or thresholds.size == 0:
+        raise ValueError(f'Настройка bands_levels должна быть непустым списком чисел, получено: {levels!r}')
+    if np.any(np.diff(thresholds) <= 0.0) or thresholds[0] < 0.0 or thresholds[-1] > 100.0:
+        raise ValueError(f'Пороги bands_levels должны возрастать в пределах 0–100, получено: {levels!r}')
+    thresholds.flags.writeable = False
+    return thresholds
+
+
+def verify_sources(sources) -> list | None:
+    """Возвращает список источников (индексы или подстроки имён устройств) или None."""
+    if sources is None:
+        return None
+    if not isinstance(sources, list) or not sources or not all(
+            isinstance(entry, str) or (isinstance(entry, int) and not isinstance(entry, bool)) for entry in sources
+    ):
+        raise ValueError(f'Настройка sources должна быть null или списком индексов и имён устройств: {sources!r}')
+    return sources
+
+
+class Settings:
+    """Проверенные настройки config.json: границы полос и пороги цветов предвычислены массивами numpy.
+
+    Некорректное значение отвергается целиком с ValueError, где названа настройка и полученное значение,
+    поэтому работающая программа может оставить прежние настройки при неудачной правке файла.
+    """
+    __slots__ = (
+        'device', 'channels_number', 'samples_number', 'blocksize', 'latency', 'maxsize', 'hop_size',
+        'stft_aggregate', 'fps', 'silence_threshold', 'silence_timeout', 'idle_fps', 'attack_ms', 'release_ms',
+        'rms_ms', 'peak_hold_ms', 'peak_decay_db', 'meter_height', 'half_blocks', 'source_devices', 'source_layout',
+        'device_check_interval', 'config_check_interval', 'stats_enabled', 'stats_interval', 'band_layout',
+        'bands_number', 'frequency_range', 'bands_levels', 'bands', 'low_band_decimation', 'low_band_crossover'
+    )
+
+    def __init__(self, variables: dict | None, defaults: dict):
+        if not isinstance(variables, dict):
+            raise ValueError('Файл config.json должен содержать объект JSON с настройками.')
+        values: dict = {**defaults, **variables}
+        device = values['device']
+        if device is not None and not isinstance(device, str):
+            verify_number('device', device, 0, integer=True)
+        self.device = device
+        self.channels_number = verify_number('channels_number', values['channels_number'], 1, integer=True)
+        self.samples_number = verify_number('samples_number', values['samples_number'], 2, integer=True)
+        self.maxsize = verify_number('maxsize', values['maxsize'], 1, integer=True)
+        self.blocksize = values['blocksize']
+        if self.blocksize is not None:
+            verify_number('blocksize', self.blocksize, 0, integer=True)
+            if self.blocksize > self.samples_number * max(2, self.maxsize):
+                raise ValueError(f'Настройка blocksize не должна превышать samples_number × maxsize: {self.blocksize}')
+        self.latency = values['latency']
+        if self.latency is not None and not isinstance(self.latency, str):
+            verify_number('latency', self.latency, 0)
+        elif self.latency is not None:
+            verify_choice('latency', self.latency, ('low', 'high'))
+        self.hop_size = values['hop_size']
+        if self.hop_size is not None:
+            verify_number('hop_size', self.hop_size, 1, integer=True)
+            if self.hop_size > self.samples_number:
+                raise ValueError(f'Настройка hop_size не должна превышать samples_number: {self.hop_size}')
+        self.low_band_decimation = verify_number('low_band_decimation', values['low_band_decimation'], 1, integer=True)
+        self.low_band_crossover = verify_number('low_band_crossover', values['low_band_crossover'], 1)
+        self.stft_aggregate = verify_choice('stft_aggregate', values['stft_aggregate'], ('max', 'mean', 'latest'))
+        self.fps = verify_number('fps', values['fps'], 1)
+        self.silence_threshold = verify_number('silence_threshold', values['silence_threshold'])
+        self.silence_timeout = verify_number('silence_timeout', values['silence_timeout'], 0)
+        self.idle_fps = verify_number('idle_fps', values['idle_fps'], 0)
+        self.attack_ms = verify_number('attack_ms', values['attack_ms'], 0)
+        self.release_ms = verify_number('release_ms', values['release_ms'], 0)
+        self.rms_ms = verify_number('rms_ms', values['rms_ms'], 0)
+        self.peak_hold_ms = verify_number('peak_hold_ms', values['peak_hold_ms'], 0)
+        self.peak_decay_db = verify_number('peak_decay_db', values['peak_decay_db'], 0)
+        self.meter_height = verify_number('meter_height', values['meter_height'], 0, integer=True)
+        self.half_blocks = verify_flag('half_blocks', values['half_blocks'])
+        self.source_devices = verify_sources(values['sources'])
+        self.source_layout = verify_choice('source_layout', values['source_layout'], ('side_by_side', 'stacked'))
+        self.device_check_interval = values['device_check_interval']
+        if self.device_check_interval is not None:
+            verify_number('device_check_interval', self.device_check_interval, 0)
+        self.config_check_interval = verify_number('config_check_interval', values['config_check_interval'], 0)
+        self.stats_enabled = verify_flag('stats_enabled', values['stats_enabled'])
+        self.stats_interval = verify_number('stats_interval', values['stats_interval'], 0)
+        self.band_layout = verify_choice('band_layout', values['band_layout'], ('custom', *FREQUENCY_SCALES))
+        self.bands_number = verify_number('bands_number', values['bands_number'], 1, integer=True)
+        frequency_range = values['frequency_range']
+        if not isinstance(frequency_range, list) or len(frequency_range) != 2:
+            raise ValueError(f'Настройка frequency_range должна быть парой [low, high], получено: {frequency_range!r}')
+        low = verify_number('frequency_range', frequency_range[0])
+        high = verify_number('frequency_range', frequency_range[1])
+        self.frequency_range = [low, high]
+        self.bands_levels = compile_levels(values['bands_levels'])
+        if self.band_layout == 'custom':
+            self.bands = compile_bands(values['bands'])
+        else:
+            self.bands = compile_bands(generate_bands(self.band_layout, self.bands_number, low, high))
+
+    def get_changes(self, other: 'Settings') -> list[str]:
+        """Возвращает имена настроек, значения которых отличаются в other."""
+        changes: list[str] = []
+        for name in self.__slots__:
+            value, new_value = getattr(self, name), getattr(other, name)
+            if isinstance(value, np.ndarray):
+                if value.shape != new_value.shape or not np.array_equal(value, new_value):
+                    changes.append(name)
+            elif value != new_value:
+                changes.append(name)
+        return changes
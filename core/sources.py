@@ -0,0 +1,142 @@
+from time import monotonic, perf_counter
+import numpy as np
+
+from .ring_buffer import RingBuffer
+from .spectrum import SpectralPlan
+
+
+class CaptureSource:
+    """Источник многоисточникового захвата: свой входной поток, кольцевой буфер, частота дискретизации и план анализа.
+
+    Callback источника пишет блок в свой кольцевой буфер и передаёт его мощность владельцу (AudioCapture),
+    который решает, будить ли общий цикл анализа.
+    """
+    __slots__ = (
+        'owner', 'device', 'name', 'samplerate', 'channels_number', 'ring_buffer', 'read_cursor', 'window',
+        'stream', 'plan', 'dynamics', 'dynamics_cursor', 'data_time', 'update_time'
+    )
+
+    def __init__(self, owner, device: int, name: str, samplerate: int, channels_number: int, capacity: int,
+                 samples_number: int):
+        self.owner = owner
+        self.device = device
+        self.name = name
+        self.samplerate = samplerate
+        self.channels_number = channels_number
+        self.ring_buffer = RingBuffer(capacity)
+        self.read_cursor = 0
+        self.window = np.empty(samples_number, dtype=np.float32)
+        self.stream = None
+        self.plan = None
+        self.dynamics = None
+        self.dynamics_cursor = 0
+        self.data_time = monotonic()
+        self.update_time = self.data_time
+
+    def _audio_callback(self, block, frames, time, status) -> None:
+        """Callback потока источника: пишет блок в кольцевой буфер источника и уведомляет владельца."""
+        started: float = perf_counter()
+        self.ring_buffer.write(block)
+        self.owner.notify_block(
+            self.ring_buffer.block_power, status, started, frames / self.samplerate / len(self.owner.sources),
+            self.owner.get_adc_delay(time, frames, self.samplerate)
+        )
+
+    def start(self, blocksize: int, latency=None) -> None:
+        """Создаёт и запускает входной поток источника с размером блока захвата и задержкой PortAudio."""
+        import sounddevice as sd
+        self.stream = sd.InputStream(
+            samplerate=self.samplerate,
+            blocksize=blocksize,
+            device=self.device,
+            channels=self.channels_number,
+            latency=latency,
+            callback=self._audio_callback,
+        )
+        self.stream.start()
+
+    def stop(self) -> None:
+        """Останавливает и закрывает поток источника."""
+        if self.stream is None:
+            return None
+        try:
+            if getattr(self.stream, 'active', False):
+                self.stream.stop()
+            self.stream.close()
+        finally:
+            self.stream = None
+
+    def grab_window(self, samples_number: int) -> np.ndarray | None:
+        """Возвращает последнее окно источника или None, если новых данных нет."""
+        written: int = self.ring_buffer.written
+        if written == self.read_cursor:
+            return None
+        self.read_cursor = written
+        return self.ring_buffer.read_latest(samples_number, self.window)
+
+    def skip_samples(self) -> None:
+        """Пропускает накопленные данные источника без анализа."""
+        self.read_cursor = self.ring_buffer.written
+
+    def get_elapsed(self) -> float:
+        """Возвращает длительность звука, захваченного источником с прошлого обновления динамики, в секундах."""
+        written: int = self.ring_buffer.written
+        elapsed: float = (written - self.dynamics_cursor) / self.samplerate
+        self.dynamics_cursor = written
+        return elapsed
+
+    def update_dynamics(self, db_levels, silence, stall_timeout: float, now: float) -> np.ndarray:
+        """Обновляет динамику уровнями db_levels, а без новых данных дольше stall_timeout — уровнями тишины.
+
+        Пока источник стоит, шаг динамики берётся по часам, поэтому полосы и пики зависшего или отключённого
+        устройства спадают, как у тишины, а не замирают.
+        """
+        if db_levels is not None:
+            self.data_time = now
+            self.update_time = now
+            return self.dynamics.update(db_levels, self.get_elapsed())
+        if now - self.data_time <= stall_timeout:
+            return self.dynamics.levels
+        elapsed: float = now - self.update_time
+        self.update_time = now
+        return self.dynamics.update(silence, elapsed)
+
+
+class SourceBatch:
+    """Общий анализ источников: свежие окна всех источников проходят через один пакетный rfft.
+
+    Источники делят samples_number и тип окна, поэтому окно и масштаб спектра общие,
+    а свёртка бинов в полосы берётся из плана каждого источника, построенного под его частоту дискретизации.
+    """
+    __slots__ = ('sources', 'samples_number', 'window', 'scale', 'frames')
+
+    def __init__(self, sources: list[CaptureSource], samples_number: int, bands, window_type: str = 'hann',
+                 layout: str = 'custom'):
+        self.sources = sources
+        self.samples_number = samples_number
+        for source in sources:
+            source.plan = SpectralPlan(samples_number, source.samplerate, bands, window_type, layout)
+        self.window = sources[0].plan.window
+        self.scale = sources[0].plan.scale
+        self.frames = np.zeros((len(sources), samples_number), dtype=np.float32)
+
+    def get_levels(self, min_db: float = -80.0, eps: float = 1e-12) -> list[np.ndarray | None]:
+        """Возвращает уровни dBFS каждого источника с новыми данными (None для остальных) за один rfft."""
+        fresh: list[int] = []
+        for i, source in enumerate(self.sources):
+            window: np.ndarray | None = source.grab_window(self.samples_number)
+            if window is not None:
+                self.frames[i] = window
+                fresh.append(i)
+        levels: list[np.ndarray | None] = [None] * len(self.sources)
+        if not fresh:
+            return levels
+        spectrum: np.ndarray = np.fft.rfft((self.frames[fresh] * self.window).astype(np.float64), axis=-1)
+        power: np.ndarray = np.abs(spectrum)
+        np.square(power, out=power)
+        power *= self.scale
+        for row, i in enumerate(fresh):
+            plan: SpectralPlan = self.sources[i].plan
+            band_power: np.ndarray = power[row, plan.bins] @ plan.reduction
+            levels[i] = np.maximum(20.0 * np.log10(np.sqrt(band_power) + eps), min_db)
+        return levels
@@ -0,0 +1,204 @@
+import numpy as np
+
+FREQUENCY_SCALES: dict = {
+    'log': (np.log, np.exp),
+    'third_octave': (np.log2, np.exp2),
+    'mel': (lambda f: 2595.0 * np.log10(1.0 + f / 700.0), lambda m: 700.0 * (10.0 ** (m / 2595.0) - 1.0)),
+    'bark': (lambda f: 26.81 * f / (1960.0 + f) - 0.53, lambda z: 1960.0 * (z + 0.53) / (26.28 - z)),
+}
+
+
+def generate_bands(layout: str, bands_number: int, low: float, high: float) -> list[list[float]]:
+    """Возвращает границы полос раскладки log, mel или bark (bands_number полос) либо третьоктавных полос."""
+    if layout not in FREQUENCY_SCALES:
+        raise ValueError(f'Неизвестная раскладка полос: {layout}')
+    if not 0.0 < low < high:
+        raise ValueError(f'Некорректный диапазон частот раскладки: {low}–{high}')
+    if layout == 'third_octave':
+        first: int = int(np.ceil(3.0 * np.log2(low / 1000.0) + 0.5))
+        last: int = int(np.floor(3.0 * np.log2(high / 1000.0) - 0.5))
+        centres: np.ndarray = 1000.0 * 2.0 ** (np.arange(first, last + 1) / 3.0)
+        edges: np.ndarray = np.append(centres * 2.0 ** (-1.0 / 6.0), centres[-1] * 2.0 ** (1.0 / 6.0))
+    else:
+        if bands_number <= 0:
+            raise ValueError(f'Количество полос должно быть положительным: {bands_number}')
+        warp, unwarp = FREQUENCY_SCALES[layout]
+        edges = unwarp(np.linspace(warp(float(low)), warp(float(high)), bands_number + 1))
+    return [[round(float(a), 2), round(float(b), 2)] for a, b in zip(edges[:-1], edges[1:])]
+
+
+def get_window_vector(samples_number: int, window_type: str = 'hann') -> np.ndarray:
+    """Возвращает numpy-массив коэффициентов оконной функции (dtype=np.float32)."""
+    if samples_number <= 0:
+        return np.empty(0, dtype=np.float32)
+    if samples_number == 1:
+        return np.array([1.0], dtype=np.float32)
+
+    wt: str = window_type.lower()
+    if wt in ('hann', 'hanning'):
+        a, b = 0.5, 0.5
+    elif wt == 'hamming':
+        a, b = 0.54, 0.46
+    else:
+        raise ValueError(f'Неизвестный window_type: {window_type}')
+
+    factor = np.float32(2.0 * np.pi / (samples_number - 1))
+    n = np.arange(samples_number, dtype=np.float32)
+    w = a - b * np.cos(factor * n)
+    return w
+
+
+class SpectralPlan:
+    """Предвычисленный план анализа: окно, масштаб спектра и матрица свёртки бинов в полосы.
+
+    Для раскладки custom каждая полоса усредняет мощность бинов [low, high); для сгенерированных раскладок
+    матрица — треугольный банк фильтров в шкале раскладки. Строки бинов вне всех полос отброшены,
+    так что свёртка идёт только по занятому диапазону спектра. Если передан columns, матрица строится по всей раскладке,
+    а план оставляет только эти полосы.
+    """
+    __slots__ = (
+        'key', 'samples_number', 'samplerate', 'window_type', 'bands', 'layout', 'window', 'scale',
+        'reduction', 'bins', 'framed', 'windowed', 'spectrum', 'power', 'levels'
+    )
+
+    def __init__(self, samples_number: int, samplerate: int, bands, window_type: str = 'hann',
+                 layout: str = 'custom', columns: np.ndarray | None = None):
+        self.samples_number = samples_number
+        self.samplerate = samplerate
+        self.window_type = window_type
+        self.bands = bands
+        self.layout = layout
+        self.key = self.build_key(samples_number, samplerate, bands, window_type, layout)
+        self.window = get_window_vector(samples_number, window_type)
+        self.scale = self._build_scale(samples_number)
+        freqs: np.ndarray = np.fft.rfftfreq(samples_number, d=1.0 / float(samplerate))
+        if layout == 'custom':
+            reduction: np.ndarray = self._build_reduction(freqs, bands)
+        else:
+            reduction = self._build_filterbank(freqs, bands, layout)
+        if columns is not None:
+            reduction = reduction[:, columns]
+        used: np.ndarray = np.flatnonzero(reduction.any(axis=1))
+        self.bins = slice(int(used[0]), int(used[-1]) + 1) if used.size else slice(0, 1)
+        self.reduction = np.ascontiguousarray(reduction[self.bins])
+        self.framed = np.empty(samples_number, dtype=np.float32)
+        self.windowed = np.empty(samples_number, dtype=np.float64)
+        self.spectrum = np.empty(self.scale.size, dtype=np.complex128)
+        self.power = np.empty(self.scale.size, dtype=np.float64)
+        self.levels = np.empty(self.reduction.shape[1], dtype=np.float64)
+
+    @staticmethod
+    def build_key(samples_number: int, samplerate: int, bands, window_type: str, layout: str = 'custom') -> tuple:
+        """Возвращает ключ, по которому план сравнивается с текущими настройками."""
+        return samples_number, samplerate, window_type, layout, id(bands), len(bands)
+
+    @staticmethod
+    def _build_scale(samples_number: int) -> np.ndarray:
+        """Возвращает множители мощности по бинам: нормировка на размер кадра и удвоение внутренних бинов."""
+        scale: np.ndarray = np.full(samples_number // 2 + 1, 1.0 / float(samples_number) ** 2)
+        if samples_number > 1:
+            scale[1:-1] *= 4.0
+        return scale
+
+    @staticmethod
+    def _build_reduction(freqs: np.ndarray, bands) -> np.ndarray:
+        """Возвращает матрицу (бины × полосы), усредняющую мощность в границах [low, high) каждой полосы."""
+        edges: np.ndarray = np.asarray(bands, dtype=np.float64).reshape(-1, 2)
+        starts: np.ndarray = np.searchsorted(freqs, edges[:, 0], side='left')
+        ends: np.ndarray = np.searchsorted(freqs, edges[:, 1], side='left')
+        reduction: np.ndarray = np.zeros((freqs.size, edges.shape[0]))
+        for i, (start, end) in enumerate(zip(starts, ends)):
+            if end > start:
+                reduction[start:end, i] = 1.0 / float(end - start)
+        return reduction
+
+    @staticmethod
+    def _build_filterbank(freqs: np.ndarray, bands, layout: str) -> np.ndarray:
+        """Возвращает треугольный банк фильтров (бины × полосы) с вершинами в центрах полос шкалы раскладки.
+
+        Соседние треугольники перекрываются так, что сумма весов между крайними центрами равна единице.
+        Полоса уже шага бинов получает линейную интерполяцию двух ближайших бинов вместо пустого окна.
+        Веса каждой полосы нормированы на единицу, поэтому результат — взвешенная средняя мощность.
+        """
+        warp, unwarp = FREQUENCY_SCALES[layout]
+        edges: np.ndarray = warp(np.asarray(bands, dtype=np.float64).reshape(-1, 2))
+        centres: np.ndarray = edges.mean(axis=1)
+        left: np.ndarray = np.concatenate((edges[:1, 0], centres[:-1]))
+        right: np.ndarray = np.concatenate((centres[1:], edges[-1:, 1]))
+        position: np.ndarray = warp(np.maximum(freqs, freqs[1] * 1e-3))[:, None]
+        rising: np.ndarray = (position - left) / np.maximum(centres - left, 1e-12)
+        falling: np.ndarray = (right - position) / np.maximum(right - centres, 1e-12)
+        weights: np.ndarray = np.clip(np.minimum(rising, falling), 0.0, None)
+
+        step: float = float(freqs[1])
+        for i in np.flatnonzero(weights.sum(axis=0) <= 0.0):
+            bin_position: float = min(float(unwarp(centres[i])) / step, freqs.size - 1.0)
+            lower: int = min(int(bin_position), freqs.size - 2)
+            fraction: float = bin_position - lower
+            weights[lower, i] = 1.0 - fraction
+            weights[lower + 1, i] = fraction
+        return weights / weights.sum(axis=0)
+
+    def matches(self, samples_number: int, samplerate: int, bands, window_type: str, layout: str = 'custom') -> bool:
+        """Проверяет, построен ли план для переданных параметров."""
+        return self.key == self.build_key(samples_number, samplerate, bands, window_type, layout)
+
+    def get_power(self, frames: np.ndarray) -> np.ndarray:
+        """Возвращает спектр мощности кадра (1D) или пакета кадров (2D, кадры по первой оси).
+
+        Окно умножается в типе сэмплов, а rfft и мощность считаются в float64 теми же операциями,
+        что и в get_frame_levels, поэтому пакетный и покадровый пути дают одинаковые уровни.
+        """
+        windowed: np.ndarray = (frames * self.window).astype(np.float64, copy=False)
+        spectrum: np.ndarray = np.fft.rfft(windowed, axis=-1)
+        power: np.ndarray = np.abs(spectrum)
+        np.square(power, out=power)
+        power *= self.scale
+        return power
+
+    @staticmethod
+    def aggregate(band_power: np.ndarray, mode: str | None = 'max') -> np.ndarray:
+        """Сводит мощности пакета кадров (кадры × полосы) в вектор: max, mean или latest; None оставляет пакет."""
+        if band_power.ndim == 1 or mode is None:
+            return band_power
+        if mode == 'max':
+            return band_power.max(axis=0)
+        if mode == 'mean':
+            return band_power.mean(axis=0)
+        if mode == 'latest':
+            return band_power[-1]
+        raise ValueError(f'Неизвестный способ агрегации кадров: {mode}')
+
+    def get_band_power(self, frames: np.ndarray, aggregate: str | None = 'max') -> np.ndarray:
+        """Возвращает среднюю мощность в полосах; пакет кадров сводится в один вектор способом aggregate."""
+        return self.aggregate(self.get_power(frames)[..., self.bins] @ self.reduction, aggregate)
+
+    def get_frame_levels(self, frame: np.ndarray, min_db: float = -80.0, eps: float = 1e-12) -> np.ndarray:
+        """Возвращает уровни dBFS одного кадра, считая во внутренних буферах плана без выделений памяти.
+
+        Кадр обрабатывается в float64: rfft над float32 выделяет временный буфер даже при переданном out.
+        Окно умножается в float32 в отдельный буфер и затем копируется в float64: умножение сразу в буфер float64
+        выделяет буфер приведения типов размером с кадр.
+        Возвращаемый массив принадлежит плану и перезаписывается следующим вызовом.
+        """
+        np.multiply(frame, self.window, out=self.framed)
+        np.copyto(self.windowed, self.framed)
+        np.fft.rfft(self.windowed, out=self.spectrum)
+        np.abs(self.spectrum, out=self.power)
+        np.square(self.power, out=self.power)
+        np.multiply(self.power, self.scale, out=self.power)
+        np.matmul(self.power[self.bins], self.reduction, out=self.levels)
+        np.sqrt(self.levels, out=self.levels)
+        np.add(self.levels, eps, out=self.levels)
+        np.log10(self.levels, out=self.levels)
+        np.multiply(self.levels, 20.0, out=self.levels)
+        return np.maximum(self.levels, min_db, out=self.levels)
+
+    def get_levels(self, frames: np.ndarray, min_db: float = -80.0, eps: float = 1e-12,
+                   aggregate: str | None = 'max') -> np.ndarray:
+        """Возвращает уровни dBFS всех полос за один векторизованный проход."""
+        if frames.ndim == 1 and frames.dtype == np.float32:
+            return self.get_frame_levels(frames, min_db, eps)
+        band_power: np.ndarray = self.get_band_power(frames, aggregate)
+        db: np.ndarray = 20.0 * np.log10(np.sqrt(band_power, dtype=np.float64) + eps)
+        return np.maximum(db, min_db)
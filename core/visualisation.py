@@ -1,25 +1,25 @@
 try:
     from curses import (
-        wrapper, error, curs_set, start_color, init_pair, use_default_colors, color_pair, has_colors,
-        COLOR_MAGENTA, COLOR_BLUE, COLOR_CYAN, COLOR_GREEN, COLOR_YELLOW, COLOR_RED
+        wrapper, error, curs_set, start_color, init_pair, use_default_colors, color_pair, has_colors, doupdate,
+        KEY_RESIZE, COLOR_MAGENTA, COLOR_BLUE, COLOR_CYAN, COLOR_GREEN, COLOR_YELLOW, COLOR_RED
     )
 except ModuleNotFoundError:
     print('\nДля работы программы необходимо установить модуль curses!\n')
 
+import numpy as np
+
 from .base import Base
 
 
 class Visualisation(Base):
-    __slots__ = ('band_levels_visualisation', 'y', 'x')
+    __slots__ = ('y', 'x', 'meter', 'drawn_cells')
 
     def __init__(self):
         super().__init__()
-        self.band_levels_visualisation = [
-            (-10, None, 0), (-8, None, 0), (-6, None, 0),
-            (-4, None, 0), (-2, None, 0), (0, None, 0)
-        ]
-        self.y = 11
+        self.y = 1
         self.x = 2
+        self.meter = None
+        self.drawn_cells = None
 
     @staticmethod
     def safe_wrapper(function, *args) -> None:
@@ -34,11 +34,11 @@ class Visualisation(Base):
 
     @staticmethod
     def init_colors() -> None:
-        """Инициализирует 6 цветовых пар."""
+        """Инициализирует 6 цветовых пар на фоне терминала по умолчанию, чтобы пустые половины ячеек не окрашивались."""
         palette: tuple = (COLOR_RED, COLOR_YELLOW, COLOR_GREEN, COLOR_CYAN, COLOR_BLUE, COLOR_MAGENTA)
         i = 1
         for fg in palette:
-            init_pair(i, fg, 1)
+            init_pair(i, fg, -1)
             i += 1
 
     def init_curses(self, stdscr) -> None:
@@ -47,32 +47,104 @@ class Visualisation(Base):
         stdscr.refresh()
         curs_set(0)
         if has_colors():
-            use_default_colors()
             start_color()
+            use_default_colors()
             self.init_colors()
 
-    def verify_band_level(self, band_level: int) -> tuple[int, int, int, int, int, int]:
-        """Возвращает кортеж из 6 целых чисел, представляющих уровни для 6 полос."""
-        if band_level >= self.bands_levels[5]:
-            return 1, 2, 3, 4, 5, 6
-        elif band_level >= self.bands_levels[4]:
-            return 0, 2, 3, 4, 5, 6
-        elif band_level >= self.bands_levels[3]:
-            return 0, 0, 3, 4, 5, 6
-        elif band_level >= self.bands_levels[2]:
-            return 0, 0, 0, 4, 5, 6
-        elif band_level >= self.bands_levels[1]:
-            return 0, 0, 0, 0, 5, 6
-        elif band_level > self.bands_levels[0]:
-            return 0, 0, 0, 0, 0, 6
-        return 0, 0, 0, 0, 0, 0
-
-    def create_band(self, stdscr, band_level: int, x: int):
-        """Создаёт и отображает одну полосу визуализации для заданного уровня и позиции."""
-        for i, (off, _, _) in enumerate(self.band_levels_visualisation):
-            color: int = self.verify_band_level(band_level)[i]
-            y: int = self.y + off
-            if color == 0:
-                stdscr.addstr(y, x, '      ')
-            else:
-                stdscr.addstr(y, x, '██████', color_pair(color))
+    @staticmethod
+    def verify_resize_key(key: int) -> bool:
+        """Проверяет, сообщает ли код клавиши об изменении размера терминала."""
+        return key == KEY_RESIZE
+
+    def get_cell_thresholds(self, cells_number: int) -> np.ndarray:
+        """Распределяет пороги bands_levels по ячейкам столбца снизу вверх с линейной интерполяцией между ними."""
+        levels: np.ndarray = np.asarray(self.bands_levels, dtype=np.float64)
+        return np.interp(np.linspace(0.0, levels.size - 1, cells_number), np.arange(levels.size), levels)
+
+    def get_cell_colors(self, thresholds: np.ndarray) -> np.ndarray:
+        """Определяет сегмент bands_levels каждой ячейки через searchsorted и переводит его в цветовую пару 6..1."""
+        segments_number: int = len(self.bands_levels)
+        segments: np.ndarray = np.searchsorted(self.bands_levels, thresholds, side='right') - 1
+        segments: np.ndarray = np.clip(segments, 0, segments_number - 1)
+        return 6 - np.rint(segments * 5.0 / max(1, segments_number - 1)).astype(np.int64)
+
+    def build_meter(self, stdscr, bands_number: int, groups: int = 1) -> None:
+        """Рассчитывает высоту, ширину, положение и пороги столбцов под размер терминала и сбрасывает ячейки.
+
+        Полосы делятся на groups групп (по одной на источник захвата), которые располагаются друг под другом
+        (source_layout stacked) или рядом через пустой столбец.
+        """
+        rows, columns = stdscr.getmaxyx()
+        group_bands: int = bands_number // groups
+        stacked: bool = groups > 1 and self.source_layout == 'stacked'
+        if stacked:
+            height: int = self.meter_height or (rows - 2 * self.y - (groups - 1)) // groups
+            step: int = max(1, (columns - 2 * self.x) // group_bands)
+        else:
+            height: int = self.meter_height or rows - 2 * self.y
+            step: int = max(1, (columns - 2 * self.x) // (bands_number + groups - 1))
+        height: int = max(1, min(height, rows - self.y))
+        width: int = step - 2 if step >= 4 else max(1, step - 1)
+        lefts: list[int] = []
+        bottoms: list[int] = []
+        for group in range(groups):
+            for band in range(group_bands):
+                if stacked:
+                    lefts.append(self.x + band * step)
+                    bottoms.append(self.y + (group + 1) * (height + 1) - 2)
+                else:
+                    lefts.append(self.x + (group * (group_bands + 1) + band) * step)
+                    bottoms.append(self.y + height - 1)
+        cells_number: int = 2 * height if self.half_blocks else height
+        thresholds: np.ndarray = self.get_cell_thresholds(cells_number)
+        colors: np.ndarray = self.get_cell_colors(thresholds)
+        if self.half_blocks:
+            colors: np.ndarray = np.stack((colors[0::2], colors[1::2]))
+        else:
+            colors: np.ndarray = np.stack((colors, colors))
+        glyphs: tuple[str, str, str, str] = (' ' * width, '▄' * width, '▀' * width, '█' * width)
+        self.meter = (bands_number, groups, height, thresholds, colors, glyphs, lefts, bottoms)
+        stdscr.erase()
+        self.drawn_cells = np.full((bands_number, height), -1, dtype=np.int64)
+
+    def get_cell_matrix(self, band_levels: list[float], peak_levels: list[float] | None = None) -> np.ndarray:
+        """Возвращает матрицу полосы × строки кодов ячеек (глиф + 4 · цвет) для всех полос за один проход.
+
+        Количество горящих ячеек полосы находится через searchsorted по порогам ячеек, пик добавляет одну ячейку;
+        при half_blocks каждая строка состоит из нижней и верхней полуячеек (▄, ▀, █).
+        """
+        thresholds, colors = self.meter[3], self.meter[4]
+        lit_number: np.ndarray = np.searchsorted(thresholds, band_levels, side='right')
+        lit: np.ndarray = np.arange(thresholds.size) < lit_number[:, None]
+        if peak_levels is not None:
+            peaks: np.ndarray = np.searchsorted(thresholds, peak_levels, side='right') - 1
+            held: np.ndarray = np.flatnonzero(peaks >= 0)
+            lit[held, peaks[held]] = True
+        if self.half_blocks:
+            lower, upper = lit[:, 0::2], lit[:, 1::2]
+        else:
+            lower, upper = lit, lit
+        glyphs: np.ndarray = lower + 2 * upper.astype(np.int64)
+        return glyphs + 4 * np.where(upper, colors[1], colors[0])
+
+    def draw_frame(self, stdscr, band_levels: list[float], peak_levels: list[float] | None = None,
+                   groups: int = 1) -> None:
+        """Отрисовывает кадр из изменившихся ячеек и выводит его на терминал одним doupdate."""
+        bands_number: int = len(band_levels)
+        if self.drawn_cells is None or self.meter[0] != bands_number or self.meter[1] != groups:
+            self.build_meter(stdscr, bands_number, groups)
+        glyphs, lefts, bottoms = self.meter[5:]
+        cells: np.ndarray = self.get_cell_matrix(band_levels, peak_levels)
+        try:
+            for band, row in np.argwhere(cells != self.drawn_cells).tolist():
+                code: int = int(cells[band, row])
+                glyph: int = code & 3
+                if glyph == 0:
+                    stdscr.addstr(bottoms[band] - row, lefts[band], glyphs[0])
+                else:
+                    stdscr.addstr(bottoms[band] - row, lefts[band], glyphs[glyph], color_pair(code >> 2))
+            self.drawn_cells = cells
+        except error:
+            self.drawn_cells = None
+        stdscr.noutrefresh()
+        doupdate()
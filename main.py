@@ -1,32 +1,105 @@
-import signal
-from time import sleep
+import os
+from argparse import ArgumentParser, Namespace
 
-from core.run import RunProgram
 
-run = RunProgram()
+def parse_arguments() -> Namespace:
+    """Разбирает аргументы командной строки."""
+    parser = ArgumentParser(description='Консольная визуализация аудио.')
+    parser.add_argument(
+        '--analyze', metavar='PATH', help='проанализировать WAV или сырой PCM файл (или каталог) без аудиоустройства'
+    )
+    parser.add_argument('--output', metavar='PATH', help='файл результатов анализа (.npy или .csv) или каталог')
+    parser.add_argument('--format', choices=('csv', 'npy'), default='csv', help='формат результатов для каталога')
+    parser.add_argument('--workers', type=int, default=1, help='количество процессов для пакетного анализа')
+    parser.add_argument('--raw', action='store_true', help='входной файл — сырой PCM без заголовка')
+    parser.add_argument('--samplerate', type=int, default=48000, help='частота дискретизации сырого PCM')
+    parser.add_argument('--channels', type=int, default=2, help='количество каналов сырого PCM')
+    parser.add_argument('--dtype', default='<i2', help='тип сэмплов сырого PCM в нотации numpy')
+    parser.add_argument(
+        '--publish', metavar='TARGET', help='публиковать уровни полос: stdout, unix:/путь/к/сокету или shm:имя'
+    )
+    parser.add_argument('--headless', action='store_true', help='работать без curses, только публикуя уровни полос')
+    parser.add_argument('--record', metavar='PATH', help='записывать блоки аудиопотока в файл сеанса')
+    parser.add_argument('--replay', metavar='PATH', help='воспроизвести файл сеанса вместо аудиоустройства')
+    parser.add_argument('--fast', action='store_true', help='воспроизводить сеанс без пауз между блоками')
+    arguments: Namespace = parser.parse_args()
+    if arguments.publish == 'stdout' and not arguments.headless:
+        parser.error('--publish stdout требует --headless: кадры в stdout испортят экран curses')
+    return arguments
+
+
+def get_analysis_jobs(arguments: Namespace) -> list[tuple[str, str]]:
+    """Возвращает пары (входной файл, файл результатов) для файла или всех записей каталога."""
+    if not os.path.isdir(arguments.analyze):
+        return [(arguments.analyze, arguments.output or f'{arguments.analyze}.{arguments.format}')]
+    extensions: tuple[str, ...] = ('.pcm', '.raw') if arguments.raw else ('.wav',)
+    output_directory: str = arguments.output or arguments.analyze
+    os.makedirs(output_directory, exist_ok=True)
+    return [
+        (os.path.join(arguments.analyze, name), os.path.join(output_directory, f'{name}.{arguments.format}'))
+        for name in sorted(os.listdir(arguments.analyze)) if name.lower().endswith(extensions)
+    ]
+
+
+def analyze_file(arguments: Namespace) -> None:
+    """Анализирует записанные файлы и сохраняет временные ряды уровней полос."""
+    from concurrent.futures import ProcessPoolExecutor
+    from core.offline import PcmSource, OfflineAnalyzer
+    from core.batch import ParallelAnalyzer
+
+    executor = ProcessPoolExecutor(arguments.workers) if arguments.workers > 1 else None
+    try:
+        for input_path, output_path in get_analysis_jobs(arguments):
+            if arguments.raw:
+                source = PcmSource.from_raw(input_path, arguments.samplerate, arguments.channels, arguments.dtype)
+            else:
+                source = PcmSource.from_wav(input_path)
+            if executor is None:
+                analyzer = OfflineAnalyzer(source)
+            else:
+                analyzer = ParallelAnalyzer(source, executor, arguments.workers)
+            analyzer.create_directories()
+            analyzer.get_logging_data()
+            analyzer.export(output_path)
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
 
 def main(name: str, version: str, year: int) -> None:
     """Запускающая все процессы главная функция."""
+    arguments: Namespace = parse_arguments()
+    if arguments.analyze:
+        analyze_file(arguments)
+        return None
 
-    def get_handler(signum, _frame) -> None:
-        run.running = False
-        run.logger.info('Задействован обработчик сигналов для корректного завершения: %s', signum)
+    from core.run import RunProgram
+    from core.publisher import create_publisher
+    from core.recording import BlockRecorder, ReplaySource
 
-    handler_tuple: tuple[str, str, str] = ('SIGHUP', 'SIGINT', 'SIGTERM')
-    for n in handler_tuple:
-        if hasattr(signal, n):
-            signal.signal(getattr(signal, n), get_handler)
+    run = RunProgram()
+    if arguments.headless and not arguments.publish:
+        arguments.publish = 'stdout'
 
     try:
         run.create_directories()
         run.get_logging_data()
         run.log_app_release(name=name, version=version, year=year)
-        run.start_stream()
-        run.create_wrapped_threads()
-        while getattr(run, 'running', True):
-            sleep(0.1)
-        run.stop_stream()
+        if arguments.replay:
+            run.replay = ReplaySource(arguments.replay)
+            run.replay_realtime = not arguments.fast
+        else:
+            if arguments.record:
+                run.recorder = BlockRecorder(arguments.record)
+            run.start_stream()
+        if arguments.publish:
+            run.publisher = create_publisher(arguments.publish, run.get_bands_number())
+        if arguments.headless:
+            run.create_headless_loop()
+        else:
+            run.create_wrapped_loop()
+        if run.replay is None:
+            run.stop_stream()
     except Exception as e:
         run.logger.error(f'Проверка выдала ошибку: {e}\nЕсли не был выполнен выход в терминал, нажми Enter.')
         try:
@@ -36,6 +109,13 @@ def main(name: str, version: str, year: int) -> None:
             run.logger.exception(
                 'Не удалось корректно остановить приложение!\nЕсли не был выполнен выход в терминал, нажми Enter.'
             )
+    finally:
+        if run.recorder is not None:
+            run.recorder.close()
+            run.logger.info(
+                'Запись сеанса %s: блоков %d, пропущено %d',
+                arguments.record, run.recorder.recorded, run.recorder.dropped
+            )
 
 
 if __name__ == '__main__':
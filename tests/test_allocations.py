@@ -0,0 +1,41 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from core.ring_buffer import RingBuffer
+from core.settings import compile_bands
+from core.spectrum import SpectralPlan, generate_bands
+
+ALLOCATION_BYTES: int = 2048
+
+
+def get_peak_allocation(samples_number: int, channels: int, layout: str, frames: int = 20) -> int:
+    """Прогоняет блоки через RingBuffer.write → read_latest → get_frame_levels и возвращает пик выделений за кадр."""
+    bands = compile_bands(generate_bands('log' if layout == 'custom' else layout, 32, 20.0, 20000.0))
+    ring_buffer = RingBuffer(4 * samples_number)
+    window: np.ndarray = np.empty(samples_number, dtype=np.float32)
+    plan = SpectralPlan(samples_number, 48000, bands, 'hann', layout)
+    block: np.ndarray = (np.random.default_rng(0).standard_normal((samples_number, channels)) * 0.3).astype(np.float32)
+    for _ in range(3):
+        ring_buffer.write(block)
+        plan.get_frame_levels(ring_buffer.read_latest(samples_number, window))
+    peaks: list[int] = []
+    tracemalloc.start()
+    try:
+        for _ in range(frames):
+            tracemalloc.reset_peak()
+            before: int = tracemalloc.get_traced_memory()[0]
+            ring_buffer.write(block)
+            plan.get_frame_levels(ring_buffer.read_latest(samples_number, window))
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    return max(peaks)
+
+
+@pytest.mark.parametrize('channels', [1, 2])
+@pytest.mark.parametrize('layout', ['custom', 'mel'])
+def test_analysis_path_does_not_allocate_arrays(layout, channels):
+    # Окно float32 из 4096 сэмплов занимает 16 КиБ, так что любой временный массив размером с кадр превысит порог.
+    assert get_peak_allocation(4096, channels, layout) <= ALLOCATION_BYTES
@@ -0,0 +1,30 @@
+from types import SimpleNamespace
+
+import pytest
+
+from core.device_watcher import DeviceWatcher
+
+try:
+    from pulsectl.pulsectl import PulseEventFacilityEnum, PulseEventTypeEnum
+except (ImportError, OSError):
+    pytest.skip('pulsectl или libpulse недоступны', allow_module_level=True)
+
+
+def get_notifications(facility: str, kind: str) -> int:
+    """Прогоняет через обработчик событие с настоящими EnumValue и возвращает число уведомлений."""
+    notifications: list[int] = []
+    watcher = DeviceWatcher(lambda: notifications.append(1))
+    event = SimpleNamespace(facility=PulseEventFacilityEnum[facility], t=PulseEventTypeEnum[kind], index=0)
+    watcher._handle_event(event)
+    return len(notifications)
+
+
+@pytest.mark.parametrize('facility, kind', [('server', 'change'), ('sink', 'new'), ('sink', 'remove'),
+                                            ('source', 'new'), ('source', 'remove')])
+def test_device_events_notify(facility, kind):
+    assert get_notifications(facility, kind) == 1
+
+
+@pytest.mark.parametrize('facility, kind', [('sink', 'change'), ('source', 'change')])
+def test_volume_changes_are_ignored(facility, kind):
+    assert get_notifications(facility, kind) == 0